@@ -5,18 +5,24 @@ import argparse
 import logging
 import yaml
 import json
+import queue
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from tqdm import tqdm
 from colorama import init, Fore, Style
 
-from src.script_generator import ScriptGenerator
+from src.script_generator import ScriptGenerator, DuplicateScriptError
 from src.voice_generator import VoiceGenerator
 from src.image_generator import ImageGenerator
 from src.video_assembler import VideoAssembler
+from src.duration_fitter import DurationFitter
 from src.thumbnail_creator import ThumbnailCreator
 from src.uploader import YouTubeUploader
+from src.http_client import get_client
+from src.provider_router import get_router
+from src.llm_cache import get_llm_cache
 
 init(autoreset=True)
 
@@ -54,6 +60,7 @@ class YouTubeAutomation:
         self.voice_gen = VoiceGenerator(self.config)
         self.image_gen = ImageGenerator(self.config)
         self.video_asm = VideoAssembler(self.config)
+        self.duration_fitter = DurationFitter(self.config)
         self.thumb_creator = ThumbnailCreator(self.config)
         self.uploader = YouTubeUploader(self.config)
         
@@ -72,8 +79,12 @@ class YouTubeAutomation:
         for d in dirs:
             os.makedirs(d, exist_ok=True)
     
-    def generate_single_video(self, niche: str = None, upload: bool = True) -> dict:
-        """Generate a single video"""
+    def generate_single_video(self, niche: str = None, upload: bool = True, video_id: str = None,
+                              metadata: dict = None) -> dict:
+        """Generate a single video; pass a previous video_id to retry it with its cached LLM responses.
+        
+        metadata is a script already generated and saved for this video_id (batch mode).
+        """
         try:
             if niche:
                 self.config['content']['niche'] = niche
@@ -83,30 +94,76 @@ class YouTubeAutomation:
             print(f"{Fore.CYAN}YOUTUBE AUTOMATION - STARTING")
             print(f"{Fore.CYAN}{'='*60}\n")
             
+            http_before = get_client().snapshot()
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            video_id = f"{self.config['content']['niche']}_{timestamp}"
-            
-            print(f"{Fore.YELLOW}Step 1/6: Generating script...")
-            metadata = self.script_gen.generate()
-            script_path = self.script_gen.save(metadata, 'data/scripts')
-            print(f"{Fore.GREEN}[OK] Script: {metadata['title']}")
-            print(f"{Fore.GREEN}   Words: {metadata['word_count']}")
-            
-            print(f"\n{Fore.YELLOW}Step 2/6: Generating voiceover...")
-            audio_path = f"data/audio/{video_id}.mp3"
-            self.voice_gen.generate(metadata['script'], audio_path)
-            audio_duration = self.voice_gen.get_audio_duration(audio_path)
-            print(f"{Fore.GREEN}[OK] Audio: {audio_duration:.2f} seconds")
+            video_id = video_id or f"{self.config['content']['niche']}_{timestamp}"
             
-            print(f"\n{Fore.YELLOW}Step 3/6: Generating images...")
-            image_dir = f"data/images/{video_id}"
-            image_paths = self.image_gen.generate_for_script(metadata['script'], image_dir)
-            print(f"{Fore.GREEN}[OK] Images: {len(image_paths)} generated")
+            with ThreadPoolExecutor(max_workers=1) as images_executor:
+                print(f"{Fore.YELLOW}Step 1/6: Generating script...")
+                image_dir = f"data/images/{video_id}"
+                if metadata is not None:
+                    images_future = images_executor.submit(
+                        self.image_gen.generate_for_script, metadata['script'], image_dir
+                    )
+                else:
+                    # Images start on the first streamed paragraphs and keep going through the voiceover
+                    script_stream = self.script_gen.stream(video_id)
+                    images_future = images_executor.submit(
+                        self.image_gen.generate_for_paragraphs, script_stream.subscribe(), image_dir
+                    )
+                    try:
+                        metadata = script_stream.run()
+                    except DuplicateScriptError as e:
+                        # The streamed script was a near-duplicate; its image job is awaited and its images discarded
+                        logger.warning(f"{e}, generating another")
+                        images_future.cancel()
+                        try:
+                            images_future.result()
+                        except Exception:
+                            pass  # the job fails with the rejected stream
+                        self.image_gen.discard(image_dir)
+                        metadata = self.script_gen.generate(video_id, first_attempt=1)
+                        images_future = images_executor.submit(
+                            self.image_gen.generate_for_script, metadata['script'], image_dir
+                        )
+                    self.script_gen.save(metadata, 'data/scripts')
+                print(f"{Fore.GREEN}[OK] Script: {metadata['title']}")
+                print(f"{Fore.GREEN}   Words: {metadata['word_count']}")
+                
+                print(f"\n{Fore.YELLOW}Step 2/6: Generating voiceover...")
+                audio_path = f"data/audio/{video_id}.mp3"
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    tracks_future = executor.submit(
+                        self.voice_gen.generate_tracks, self._extra_voice_tracks(metadata), 'data/audio', video_id
+                    )
+                    self.voice_gen.generate(metadata['script'], audio_path)
+                    duration_fit = self.duration_fitter.fit(audio_path)
+                    audio_duration = self.voice_gen.get_audio_duration(audio_path)
+                    extra_tracks = tracks_future.result()
+                for track in extra_tracks:
+                    # Extra tracks must end with the video, not just near the script's target length
+                    self.duration_fitter.fit(track['path'], audio_duration,
+                                             tolerance=self.duration_fitter.track_tolerance)
+                print(f"{Fore.GREEN}[OK] Audio: {audio_duration:.2f} seconds")
+                if duration_fit['applied']:
+                    print(f"{Fore.GREEN}   Fitted: {duration_fit['deviation_seconds']:+.1f}s off target, "
+                          f"tempo {duration_fit['tempo']:.3f}, pauses {duration_fit['silence_adjust_seconds']:+.1f}s")
+                if extra_tracks:
+                    print(f"{Fore.GREEN}   Extra tracks: {', '.join(t['language'] for t in extra_tracks)}")
+                
+                print(f"\n{Fore.YELLOW}Step 3/6: Generating images...")
+                image_paths = images_future.result()
+                print(f"{Fore.GREEN}[OK] Images: {len(image_paths)} generated")
             
             print(f"\n{Fore.YELLOW}Step 4/6: Assembling video...")
             video_path = f"data/videos/{video_id}.mp4"
-            self.video_asm.assemble(image_paths, audio_path, video_path)
+            self.video_asm.assemble(image_paths, audio_path, video_path, extra_tracks=[
+                {'path': t['path'], 'language': t['language'], 'title': t.get('voice_name')}
+                for t in extra_tracks
+            ])
+            render_report = dict(self.video_asm.last_report)
             print(f"{Fore.GREEN}[OK] Video: {video_path}")
+            print(f"{Fore.GREEN}   Audio: {render_report.get('audio')} ({render_report.get('audio_codec')})")
             
             print(f"\n{Fore.YELLOW}Step 5/6: Creating thumbnail...")
             thumbnail_path = f"data/thumbnails/{video_id}.jpg"
@@ -119,6 +176,8 @@ class YouTubeAutomation:
                 'video_path': video_path,
                 'thumbnail_path': thumbnail_path,
                 'metadata': metadata,
+                'render': render_report,
+                'duration_fit': duration_fit,
                 'timestamp': timestamp
             }
             
@@ -135,6 +194,12 @@ class YouTubeAutomation:
             else:
                 print(f"\n{Fore.BLUE}Step 6/6: Skipped (--no-upload flag)")
             
+            http_client = get_client()
+            http_client.log_stats(http_before)
+            result['http'] = http_client.stats(http_before)
+            get_router().save()
+            get_llm_cache().prune()
+            
             self._save_result(result)
             
             print(f"\n{Fore.CYAN}{'='*60}")
@@ -148,25 +213,81 @@ class YouTubeAutomation:
             print(f"\n{Fore.RED}[ERROR]: {e}")
             raise
     
+    def resume_uploads(self) -> dict:
+        """Continue uploads that an earlier, interrupted run left unfinished"""
+        results = self.uploader.resume_pending()
+        for video_path, yt_video_id in results.items():
+            if yt_video_id:
+                print(f"{Fore.GREEN}[OK] Resumed upload: {video_path} -> https://www.youtube.com/watch?v={yt_video_id}")
+            else:
+                print(f"{Fore.RED}[ERROR] Resumed upload failed: {video_path}")
+        return results
+    
+    def _extra_voice_tracks(self, metadata: dict) -> list:
+        """Build extra narration track specs from config.
+        
+        A track in the script's own language narrates the script with another
+        voice; a foreign-language track needs metadata['translations'][language].
+        """
+        script_language = self.config['youtube'].get('language', 'en').split('-')[0]
+        translations = metadata.get('translations', {})
+        tracks = []
+        for track in self.config['voice'].get('extra_tracks') or []:
+            if track['language'].split('-')[0] == script_language:
+                text = metadata['script']
+            elif translations.get(track['language']):
+                text = translations[track['language']]
+            else:
+                # Never narrate the original script under another language's tag
+                logger.warning(f"No {track['language']} translation of the script, skipping that voice track")
+                continue
+            tracks.append({
+                'language': track['language'],
+                'voice_name': track.get('voice_name'),
+                'text': text
+            })
+        return tracks
+    
     def generate_batch(self, count: int, niche: str = None, upload: bool = True) -> list:
-        """Generate multiple videos"""
+        """Generate multiple videos.
+        
+        All scripts are generated up front by a small thread pool and queued as they
+        finish, so after the first video rendering never waits on an LLM call.
+        """
         results = []
         
         print(f"\n{Fore.CYAN}{'='*60}")
         print(f"{Fore.CYAN}BATCH MODE: Generating {count} videos")
         print(f"{Fore.CYAN}{'='*60}\n")
         
-        for i in range(count):
-            print(f"\n{Fore.MAGENTA}{'='*60}")
-            print(f"{Fore.MAGENTA}VIDEO {i+1}/{count}")
-            print(f"{Fore.MAGENTA}{'='*60}")
+        if niche:
+            self.config['content']['niche'] = niche
+            self.script_gen.niche = niche
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        video_ids = [f"{self.config['content']['niche']}_{timestamp}_{i+1:02d}" for i in range(count)]
+        workers = max(1, min(count, self.config['script'].get('prefetch_workers', 3)))
+        scripts = queue.Queue()
+        
+        with ThreadPoolExecutor(max_workers=workers) as script_executor:
+            for video_id in video_ids:
+                script_executor.submit(self._precompute_script, video_id, scripts)
             
-            try:
-                result = self.generate_single_video(niche, upload)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Video {i+1} failed: {e}")
-                print(f"{Fore.RED}[ERROR] Video {i+1} failed, continuing...")
+            for i in range(count):
+                print(f"\n{Fore.MAGENTA}{'='*60}")
+                print(f"{Fore.MAGENTA}VIDEO {i+1}/{count}")
+                print(f"{Fore.MAGENTA}{'='*60}")
+                
+                try:
+                    # Scripts are rendered in the order they finish
+                    video_id, metadata, error = scripts.get()
+                    if error:
+                        raise error
+                    result = self.generate_single_video(niche, upload, video_id, metadata)
+                    results.append(result)
+                except Exception as e:
+                    logger.error(f"Video {i+1} failed: {e}")
+                    print(f"{Fore.RED}[ERROR] Video {i+1} failed, continuing...")
         
         print(f"\n{Fore.CYAN}{'='*60}")
         print(f"{Fore.GREEN}BATCH COMPLETE: {len(results)}/{count} successful")
@@ -174,6 +295,17 @@ class YouTubeAutomation:
         
         return results
     
+    def _precompute_script(self, video_id: str, scripts: queue.Queue):
+        """Generate and save one batch script, queueing (video_id, metadata, error)"""
+        try:
+            metadata = self.script_gen.generate(video_id)
+            # Saving indexes the script, so scripts still in progress are checked against it
+            self.script_gen.save(metadata, 'data/scripts')
+            logger.info(f"📝 Script ready for {video_id}: {metadata['title']}")
+            scripts.put((video_id, metadata, None))
+        except Exception as e:
+            scripts.put((video_id, None, e))
+    
     def _save_result(self, result: dict):
         """Save result to JSON log"""
         log_file = 'logs/videos.json'
@@ -203,19 +335,28 @@ def main():
                        help='Skip YouTube upload')
     parser.add_argument('--privacy', choices=['public', 'private', 'unlisted'], default='public',
                        help='Video privacy setting')
+    parser.add_argument('--video-id',
+                       help='Retry a previous video ID, reusing its cached LLM responses (single mode)')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                       help='Ignore cached LLM responses (fresh responses are still cached)')
     
     args = parser.parse_args()
     
     try:
         automation = YouTubeAutomation()
         
+        if args.no_llm_cache:
+            get_llm_cache().bypass = True
+        
         if args.privacy:
             automation.config['youtube']['privacy'] = args.privacy
         
         upload = not args.no_upload
+        if upload and args.mode != 'schedule':
+            automation.resume_uploads()
         
         if args.mode == 'single':
-            automation.generate_single_video(args.niche, upload)
+            automation.generate_single_video(args.niche, upload, args.video_id)
         
         elif args.mode == 'batch':
             automation.generate_batch(args.count, args.niche, upload)
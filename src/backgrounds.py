@@ -0,0 +1,179 @@
+"""Backgrounds - Procedural fallback backgrounds (gradients, bokeh, grain) rendered with NumPy"""
+import os
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import numpy as np
+from typing import Dict, Tuple
+from PIL import Image, ImageChops
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (dark base, mid tone, highlight) per niche
+PALETTES = {
+    'psychology_facts': [(12, 10, 32), (58, 28, 96), (150, 110, 220)],
+    'history_mystery': [(22, 16, 10), (92, 62, 30), (214, 170, 98)],
+    'finance': [(6, 20, 16), (18, 84, 58), (212, 182, 84)],
+    'reddit_stories': [(14, 18, 30), (36, 62, 110), (236, 120, 72)],
+    'default': [(16, 16, 22), (50, 50, 70), (170, 170, 200)]
+}
+
+STYLES = ('gradient', 'bokeh', 'nebula')
+
+
+class BackgroundGenerator:
+    """Renders niche-colored backgrounds and caches each (niche, style, variant, size) as a JPEG.
+
+    Smooth layers are computed on a grid `downscale` times smaller than the frame
+    and upscaled bilinearly. Grain is a noise tile repeated across the frame and
+    added without clipping; the smooth layer is pre-shifted into [0, 255 - 2*grain]
+    so the sum can't overflow. A cache hit is a file copy, so repeated fallbacks
+    cost nothing.
+    """
+
+    def __init__(self, config: Dict, size: Tuple[int, int] = (1920, 1080), quality: int = 95):
+        self.size = size
+        self.quality = quality
+        self.cache_dir = config.get('cache_dir', 'data/cache/backgrounds')
+        self.variants = config.get('variants', 8)
+        self.downscale = config.get('downscale', 8)
+        self.grain = int(config.get('grain', 6))
+        self._noise = None
+        self._lock = threading.Lock()
+
+    def create(self, niche: str, seed_text: str, output_path: str) -> str:
+        """Write a background for a niche to output_path; seed_text picks the variant"""
+        digest = int(hashlib.sha1(seed_text.encode('utf-8')).hexdigest(), 16)
+        variant = digest % self.variants
+        style = STYLES[variant % len(STYLES)]
+        palette_name = niche if niche in PALETTES else 'default'
+
+        cache_path = os.path.join(
+            self.cache_dir, f"{palette_name}_{style}_{variant}_{self.size[0]}x{self.size[1]}.jpg"
+        )
+        if os.path.exists(cache_path):
+            shutil.copyfile(cache_path, output_path)
+            return output_path
+
+        start = time.perf_counter()
+        image = self.render(PALETTES[palette_name], style, seed=variant)
+        render_ms = (time.perf_counter() - start) * 1000
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(temp_path, 'JPEG', quality=self.quality)
+        os.replace(temp_path, cache_path)
+        shutil.copyfile(cache_path, output_path)
+
+        logger.info(f"🌌 Rendered {style} background for {palette_name} in {render_ms:.1f} ms")
+        return output_path
+
+    def render(self, palette, style: str = 'gradient', seed: int = 0) -> Image.Image:
+        """Return an RGB image of self.size"""
+        rng = np.random.default_rng(seed)
+        width, height = self.size
+        w, h = max(2, width // self.downscale), max(2, height // self.downscale)
+        base, mid, light = (np.array(c, dtype=np.float32) / 255 for c in palette)
+
+        x = np.linspace(0, 1, w, dtype=np.float32)[None, :]
+        y = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+
+        # Diagonal gradient from base to mid tone at a random angle
+        angle = rng.uniform(0, 2 * np.pi)
+        t = (x - 0.5) * np.cos(angle) + (y - 0.5) * np.sin(angle)
+        t = np.clip(t + 0.5, 0, 1)[..., None]
+        image = base * (1 - t) + mid * t
+
+        # Off-center glow
+        cx, cy = rng.uniform(0.2, 0.8, 2)
+        glow = np.exp(-((x - cx) ** 2 + ((y - cy) * h / w) ** 2) / 0.08)[..., None]
+        image += (light - base) * glow * 0.35
+
+        if style == 'bokeh':
+            image = self._bokeh(image, x, y, light, rng, aspect=h / w)
+        elif style == 'nebula':
+            image = self._nebula(image, mid, light, rng)
+
+        # Vignette
+        vignette = 1 - 0.55 * (((x - 0.5) ** 2 + (y - 0.5) ** 2) * 2)[..., None]
+        image *= np.clip(vignette, 0, 1)
+
+        image = np.clip(image * 255 - self.grain, 0, 255 - 2 * self.grain)
+        # Bilinear to half size, then pixel doubling: the content is smooth and the
+        # full-resolution grain hides the 2x2 blocks, at a quarter of the cost
+        small = Image.fromarray(image.astype(np.uint8))
+        half = small.resize((width // 2, height // 2), Image.Resampling.BILINEAR)
+        frame = half.resize(self.size, Image.Resampling.NEAREST)
+
+        if self.grain:
+            frame = ImageChops.add_modulo(frame, self._grain_layer())
+        return frame
+
+    def _grain_layer(self) -> Image.Image:
+        """Frame-sized noise in [0, 2*grain], built once from a repeated tile"""
+        with self._lock:
+            if self._noise is None:
+                width, height = self.size
+                rng = np.random.default_rng(0)
+                tile = np.clip(rng.normal(self.grain, self.grain / 2, (128, 128)), 0, 2 * self.grain)
+                noise = np.tile(tile.astype(np.uint8), (height // 128 + 1, width // 128 + 1))[:height, :width]
+                self._noise = Image.fromarray(noise).convert('RGB')
+            return self._noise
+
+    @staticmethod
+    def _bokeh(image: np.ndarray, x: np.ndarray, y: np.ndarray, light: np.ndarray,
+               rng: np.random.Generator, count: int = 14, aspect: float = 9 / 16) -> np.ndarray:
+        """Soft out-of-focus discs, all circles evaluated in one broadcast"""
+        cx = rng.uniform(0, 1, (count, 1, 1)).astype(np.float32)
+        cy = rng.uniform(0, 1, (count, 1, 1)).astype(np.float32)
+        radius = rng.uniform(0.03, 0.12, (count, 1, 1)).astype(np.float32)
+        strength = rng.uniform(0.15, 0.45, (count, 1, 1)).astype(np.float32)
+
+        distance = np.sqrt((x - cx) ** 2 + ((y - cy) * aspect) ** 2)
+        discs = np.clip((radius - distance) / (radius * 0.25), 0, 1) * strength
+        light_mask = 1 - np.prod(1 - discs, axis=0)
+        return image + (light - image) * light_mask[..., None]
+
+    @staticmethod
+    def _nebula(image: np.ndarray, mid: np.ndarray, light: np.ndarray,
+                rng: np.random.Generator) -> np.ndarray:
+        """Cloudy value noise: a few upsampled random octaves summed"""
+        h, w = image.shape[:2]
+        clouds = np.zeros((h, w), dtype=np.float32)
+        for octave, weight in ((4, 0.5), (8, 0.3), (16, 0.2)):
+            grid = rng.random((octave * h // w + 2, octave + 2)).astype(np.float32)
+            layer = Image.fromarray(grid).resize((w, h), Image.Resampling.BICUBIC)
+            clouds += np.asarray(layer) * weight
+
+        clouds = np.clip((clouds - 0.45) * 2.2, 0, 1)[..., None]
+        tint = mid * 0.6 + light * 0.4
+        return image + (tint - image) * clouds * 0.6
+
+
+def main():
+    """Render one background per niche and style and time it"""
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    size = tuple(map(int, config['video'].get('resolution', '1920x1080').split('x')))
+    generator = BackgroundGenerator(config['images'].get('fallback', {}), size)
+    output_dir = 'data/images/backgrounds_test'
+    os.makedirs(output_dir, exist_ok=True)
+
+    for niche, palette in PALETTES.items():
+        for variant, style in enumerate(STYLES):
+            start = time.perf_counter()
+            image = generator.render(palette, style, seed=variant)
+            elapsed = (time.perf_counter() - start) * 1000
+            path = os.path.join(output_dir, f"{niche}_{style}.jpg")
+            image.save(path, 'JPEG', quality=90)
+            print(f"  {niche:<18}{style:<10}{elapsed:6.1f} ms  📁 {path}")
+
+
+if __name__ == '__main__':
+    main()
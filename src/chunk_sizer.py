@@ -0,0 +1,112 @@
+"""Chunk Sizer - Adaptive resumable-upload chunk size from measured throughput and round-trip time"""
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UNIT = 256 * 1024  # resumable upload chunks must be multiples of 256 KB
+MB = 1024 * 1024
+
+
+class ChunkSizer:
+    """Picks the next chunk size from the outcome of the previous chunks.
+
+    Each chunk costs roughly `rtt + size / bandwidth`. Both are estimated with a
+    least-squares fit over recent (size, seconds) samples, which vary in size as
+    the chunk grows. The size doubles while throughput keeps improving by more
+    than `min_gain`. Once it plateaus, the chunk only grows to the size at which
+    the round trip is at most `max_overhead` of the chunk's time. An error halves
+    the size and resets the best throughput, so growth starts over carefully.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, initial: Optional[int] = None):
+        config = config or {}
+        self.min_size = self._units(config.get('min_chunk_mb', 1) * MB)
+        self.max_size = max(self.min_size, self._units(config.get('max_chunk_mb', 64) * MB))
+        self.max_overhead = config.get('max_overhead', 0.1)
+        self.min_gain = config.get('min_gain', 0.05)
+        self.size = self._clamp(initial or config.get('initial_chunk_mb', 4) * MB)
+
+        self.best = 0.0
+        self.rtt = None
+        self.bandwidth = None
+        self.sent = 0
+        self.seconds = 0.0
+        self.history: List[Tuple[int, float]] = []  # (chunk size, MB/s) per chunk
+        self._samples = deque(maxlen=8)
+
+    @staticmethod
+    def _units(size: float) -> int:
+        return max(1, int(size) // UNIT) * UNIT
+
+    def _clamp(self, size: float) -> int:
+        return min(self.max_size, max(self.min_size, self._units(size)))
+
+    def record(self, sent: int, seconds: float) -> float:
+        """Account for one successful chunk and choose the next size; returns its MB/s"""
+        if sent <= 0 or seconds <= 0:
+            return 0.0
+        self.sent += sent
+        self.seconds += seconds
+        throughput = sent / seconds
+        self.history.append((self.size, throughput / MB))
+        self._samples.append((sent, seconds))
+        self._estimate()
+
+        if throughput > self.best * (1 + self.min_gain):
+            self.best = throughput
+            self.size = self._clamp(self.size * 2)
+        elif self.rtt and self.bandwidth:
+            target = self.rtt * self.bandwidth * (1 - self.max_overhead) / self.max_overhead
+            self.size = self._clamp(min(max(self.size, target), self.size * 2))
+        return throughput / MB
+
+    def failed(self) -> bool:
+        """A chunk failed: halve the size; returns False if it was already the minimum"""
+        previous = self.size
+        self.size = self._clamp(self.size // 2)
+        self.best = 0.0
+        return self.size < previous
+
+    def _estimate(self):
+        """Fit seconds = rtt + bytes / bandwidth over the recent samples"""
+        sizes = [s for s, _ in self._samples]
+        if len(set(sizes)) < 2:
+            return
+        n = len(self._samples)
+        mean_x = sum(sizes) / n
+        mean_y = sum(t for _, t in self._samples) / n
+        var = sum((x - mean_x) ** 2 for x in sizes)
+        slope = sum((x - mean_x) * (t - mean_y) for x, t in self._samples) / var
+        if slope <= 0:
+            return
+        self.bandwidth = 1 / slope
+        self.rtt = max(0.0, mean_y - slope * mean_x)
+
+    def summary(self) -> str:
+        """Average throughput and how the chunk size moved, for the upload log"""
+        average = self.sent / self.seconds / MB if self.seconds else 0.0
+        sizes = []
+        for size, _ in self.history:
+            label = f"{size / MB:g}"
+            if not sizes or sizes[-1] != label:
+                sizes.append(label)
+        rtt = f", RTT ~{self.rtt * 1000:.0f} ms" if self.rtt is not None else ''
+        return f"{self.sent / MB:.1f} MB in {self.seconds:.1f}s ({average:.2f} MB/s{rtt}), chunks {'→'.join(sizes)} MB"
+
+
+def main():
+    """Simulate an upload link (RTT 300 ms, 8 MB/s) to show how the chunk size settles"""
+    sizer = ChunkSizer()
+    remaining = 300 * MB
+    while remaining > 0:
+        sent = min(sizer.size, remaining)
+        sizer.record(sent, 0.3 + sent / (8 * MB))
+        remaining -= sent
+    print(f"📈 {sizer.summary()}")
+
+
+if __name__ == '__main__':
+    main()
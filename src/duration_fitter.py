@@ -0,0 +1,176 @@
+"""Duration Fitter - Stretches or tightens a voiceover to a target length in one pass"""
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.media_utils import (
+    run_ffmpeg, probe_duration, detect_silences, load_audio_info, save_audio_info
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DurationFitter:
+    def __init__(self, config: dict):
+        self.config = config
+        fit_config = config['voice'].get('duration_fit', {})
+        self.enabled = fit_config.get('enabled', True)
+        self.tolerance = fit_config.get('tolerance_seconds', 5.0)
+        self.track_tolerance = fit_config.get('track_tolerance_seconds', 0.5)
+        self.min_tempo = fit_config.get('min_tempo', 0.9)
+        self.max_tempo = fit_config.get('max_tempo', 1.15)
+        self.silence_threshold_db = fit_config.get('silence_threshold_db', -35.0)
+        self.min_silence = fit_config.get('min_silence', 0.3)
+        self.min_kept_silence = fit_config.get('min_kept_silence', 0.15)
+        self.max_pad_per_silence = fit_config.get('max_pad_per_silence', 0.6)
+        self.max_segments = fit_config.get('max_segments', 150)
+
+    def target_seconds(self) -> float:
+        """Target voiceover length from content.video_length_minutes"""
+        return float(self.config['content']['video_length_minutes']) * 60
+
+    def fit(self, audio_path: str, target_seconds: Optional[float] = None,
+            output_path: Optional[str] = None, tolerance: Optional[float] = None) -> Dict:
+        """Fit audio to the target length; rewrites audio_path unless output_path is given.
+
+        Fitting is optional polish: if probing or ffmpeg fails, the audio is left
+        unfitted and the report says so instead of failing the video.
+        """
+        target = target_seconds if target_seconds is not None else self.target_seconds()
+        tolerance = tolerance if tolerance is not None else self.tolerance
+        output_path = output_path or audio_path
+        try:
+            return self._fit(audio_path, target, output_path, tolerance)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not fit {audio_path} to {target:.1f}s, keeping it unfitted: {e}")
+            try:
+                os.remove(f"{output_path}.fit.mp3")
+            except OSError:
+                pass
+            return {'target_seconds': round(target, 2), 'applied': False, 'error': str(e)}
+
+    def _fit(self, audio_path: str, target: float, output_path: str, tolerance: float) -> Dict:
+        original = probe_duration(audio_path)
+        report = {
+            'original_seconds': round(original, 2),
+            'target_seconds': round(target, 2),
+            'deviation_seconds': round(original - target, 2),
+            'tempo': 1.0,
+            'silence_adjust_seconds': 0.0,
+            'fitted_seconds': round(original, 2),
+            'applied': False
+        }
+
+        if not self.enabled or abs(original - target) <= tolerance:
+            logger.info(f"⏱️ Voiceover {original:.1f}s is within {tolerance:g}s of target, no fitting")
+            return report
+
+        silences = self._pick_silences(detect_silences(audio_path, self.silence_threshold_db, self.min_silence))
+        adjustments = self._plan_silences(silences, target - original)
+        silence_adjust = sum(adjustments)
+
+        adjusted = original + silence_adjust
+        tempo = min(self.max_tempo, max(self.min_tempo, adjusted / target))
+        if abs(tempo - 1.0) < 0.005:
+            tempo = 1.0
+
+        filter_graph = self._build_filter(silences, adjustments, tempo)
+        temp_path = f"{output_path}.fit.mp3"
+        info = load_audio_info(audio_path)
+
+        run_ffmpeg([
+            '-y', '-i', audio_path, '-filter_complex', filter_graph, '-map', '[out]',
+            '-c:a', 'libmp3lame', '-b:a', '192k', temp_path
+        ])
+        os.replace(temp_path, output_path)
+
+        # Tempo and pause changes don't move gated integrated loudness, so carry the measurement over
+        if info:
+            save_audio_info(output_path, {k: v for k, v in info.items() if k not in ('size', 'mtime')})
+
+        report.update({
+            'tempo': round(tempo, 4),
+            'silence_adjust_seconds': round(silence_adjust, 2),
+            'fitted_seconds': round(adjusted / tempo, 2),
+            'applied': True
+        })
+        logger.info(f"⏱️ Fitted voiceover {original:.1f}s → {adjusted / tempo:.1f}s "
+                    f"(target {target:.1f}s, tempo {tempo:.3f}, pauses {silence_adjust:+.1f}s)")
+        return report
+
+    def _pick_silences(self, silences: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """Keep the longest pauses, up to max_segments, in time order"""
+        longest = sorted(silences, key=lambda s: s[1] - s[0], reverse=True)[:self.max_segments]
+        return sorted(longest)
+
+    def _plan_silences(self, silences: List[Tuple[float, float]], needed: float) -> List[float]:
+        """Per-pause length changes (seconds, input time) covering as much of `needed` as allowed"""
+        if not silences:
+            return []
+
+        if needed > 0:
+            per_silence = min(self.max_pad_per_silence, needed / len(silences))
+            return [per_silence] * len(silences)
+
+        slack = [max(0.0, (end - start) - self.min_kept_silence) for start, end in silences]
+        total_slack = sum(slack)
+        if total_slack == 0:
+            return [0.0] * len(silences)
+
+        ratio = min(1.0, -needed / total_slack)
+        return [-s * ratio for s in slack]
+
+    def _build_filter(self, silences: List[Tuple[float, float]], adjustments: List[float], tempo: float) -> str:
+        """Build a filter graph that cuts/pads pauses and applies pitch-preserving tempo"""
+        segments = []
+        cursor = 0.0
+        for (start, end), adjust in zip(silences, adjustments):
+            if abs(adjust) < 0.01:
+                continue
+
+            length = end - start
+            if adjust < 0:
+                keep = length + adjust
+                segments.append((cursor, start + keep / 2, 0.0))
+                cursor = end - keep / 2
+            else:
+                middle = start + length / 2
+                segments.append((cursor, middle, adjust))
+                cursor = middle
+        segments.append((cursor, None, 0.0))
+
+        tempo_filter = f"atempo={tempo:.4f}"
+        if len(segments) == 1:
+            return f"[0:a]{tempo_filter}[out]"
+
+        parts = [f"[0:a]asplit={len(segments)}" + ''.join(f"[in{i}]" for i in range(len(segments)))]
+        for i, (seg_start, seg_end, pad) in enumerate(segments):
+            trim = f"atrim=start={seg_start:.3f}" + (f":end={seg_end:.3f}" if seg_end is not None else '')
+            pad_filter = f",apad=pad_dur={pad:.3f}" if pad > 0 else ''
+            parts.append(f"[in{i}]{trim},asetpts=PTS-STARTPTS{pad_filter}[s{i}]")
+
+        concat_inputs = ''.join(f"[s{i}]" for i in range(len(segments)))
+        parts.append(f"{concat_inputs}concat=n={len(segments)}:v=0:a=1,{tempo_filter}[out]")
+        return ';'.join(parts)
+
+
+def main():
+    """Test duration fitter"""
+    import sys
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    fitter = DurationFitter(config)
+    audio_path = sys.argv[1] if len(sys.argv) > 1 else 'data/audio/test.mp3'
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    report = fitter.fit(audio_path, target, output_path=f"{audio_path}.fitted.mp3")
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""HTTP Client - Shared pooled sessions with retries and per-host metrics"""
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """One keep-alive session per host, retrying 429/5xx with exponential backoff and full jitter.
+
+    Read timeouts are not retried unless `retry_read_timeouts` is set: a server
+    that was too slow once is likely to be slow again, and the caller usually has
+    a faster fallback. No retry starts after `max_total_seconds` from the first
+    attempt, and a retry's timeout is cut to the time left.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.retries = config.get('retries', 3)
+        self.backoff_base = config.get('backoff_base', 0.5)
+        self.backoff_max = config.get('backoff_max', 20.0)
+        self.pool_maxsize = config.get('pool_maxsize', 10)
+        self.default_timeout = config.get('timeout', 30)
+        self.retry_read_timeouts = config.get('retry_read_timeouts', False)
+        self.max_total_seconds = config.get('max_total_seconds', 45)
+
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET with pooling and retries"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST with pooling and retries"""
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, retries: Optional[int] = None,
+                before_retry: Optional[Callable[[], Any]] = None, **kwargs) -> requests.Response:
+        """Send a request, retrying connection errors, 429 and 5xx responses.
+
+        before_retry is called before every retry, e.g. to take another
+        rate-limiter token, since the caller's limiter only covered the first attempt.
+        """
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        retries = self.retries if retries is None else retries
+        timeout = kwargs.pop('timeout', self.default_timeout)
+        deadline = time.perf_counter() + self.max_total_seconds
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, time.perf_counter() - start, failed=True)
+                read_timeout = isinstance(e, requests.ReadTimeout)
+                delay = self._backoff(attempt)
+                if attempt >= retries or (read_timeout and not self.retry_read_timeouts) \
+                        or time.perf_counter() + delay >= deadline:
+                    raise
+                logger.warning(f"🔁 {host}: {type(e).__name__}, retry {attempt + 1}/{retries} in {delay:.1f}s")
+            else:
+                elapsed = time.perf_counter() - start
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                if response.status_code not in RETRY_STATUSES or attempt >= retries \
+                        or time.perf_counter() + delay >= deadline:
+                    self._record(host, elapsed, failed=response.status_code >= 400)
+                    return response
+
+                self._record(host, elapsed, failed=True)
+                logger.warning(f"🔁 {host}: HTTP {response.status_code}, retry {attempt + 1}/{retries} in {delay:.1f}s")
+                response.content  # drain the body so the connection goes back to the pool
+
+            attempt += 1
+            with self._lock:
+                self._stats[host]['retries'] += 1
+            time.sleep(delay)
+            if before_retry:
+                before_retry()
+            if isinstance(timeout, (int, float)):
+                timeout = max(1.0, min(timeout, deadline - time.perf_counter()))
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _session(self, host: str) -> requests.Session:
+        """Return the keep-alive session for a host, creating it on first use"""
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+                self._stats[host] = {'requests': 0, 'retries': 0, 'failures': 0, 'total_time': 0.0, 'max_time': 0.0}
+            return self._sessions[host]
+
+    def _record(self, host: str, elapsed: float, failed: bool):
+        """Update timing counters for a host"""
+        with self._lock:
+            stats = self._stats[host]
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            if failed:
+                stats['failures'] += 1
+
+    def _connections_opened(self, host: str) -> int:
+        """Number of TCP connections the host's pools have opened so far"""
+        opened = 0
+        for adapter in self._sessions[host].adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                opened += getattr(pool, 'num_connections', 0) if pool else 0
+        return opened
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Raw per-host counters, to pass to stats()/log_stats() later as `since`"""
+        with self._lock:
+            return {host: dict(stats, connections_opened=self._connections_opened(host))
+                    for host, stats in self._stats.items()}
+
+    def stats(self, since: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Per-host request counts, retries, timings and connection reuse.
+
+        With `since` (an earlier snapshot()) the counts cover only what happened
+        after it; max_ms always covers the whole process.
+        """
+        since = since or {}
+        report = {}
+        for host, current in self.snapshot().items():
+            before = since.get(host, {})
+            stats = {key: value - before.get(key, 0) for key, value in current.items() if key != 'max_time'}
+            requests_made = stats['requests']
+            if not requests_made:
+                continue
+            opened = stats['connections_opened']
+            report[host] = {
+                'requests': requests_made,
+                'retries': stats['retries'],
+                'failures': stats['failures'],
+                'connections_opened': opened,
+                # Redirects can open connections to a host that made no requests of its own
+                'reuse_rate': round(max(0.0, 1 - opened / requests_made), 3),
+                'avg_ms': round(stats['total_time'] / requests_made * 1000, 1),
+                'max_ms': round(current['max_time'] * 1000, 1)
+            }
+        return report
+
+    def log_stats(self, since: Optional[Dict[str, Dict]] = None):
+        """Log a one-line summary per host"""
+        for host, s in self.stats(since).items():
+            logger.info(f"🌐 {host}: {s['requests']} requests, {s['retries']} retries, "
+                        f"{s['connections_opened']} connections (reuse {s['reuse_rate']:.0%}), "
+                        f"avg {s['avg_ms']:.0f}ms")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(config: Optional[Dict] = None) -> HttpClient:
+    """Return the process-wide client; the first caller's config wins"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(config)
+        return _client
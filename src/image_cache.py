@@ -0,0 +1,175 @@
+"""Image Cache - Disk cache of provider images keyed by (provider, prompt, resolution)"""
+import os
+import time
+import random
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Set
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """Stores several distinct images per key and hands out a varied one on hits.
+
+    Writes are atomic (temp file + rename) and eviction runs under a lock file, so
+    several worker processes on one host can share the same cache directory.
+    """
+
+    def __init__(self, config: dict):
+        self.enabled = config.get('enabled', True)
+        self.directory = config.get('dir', 'data/cache/images')
+        self.max_bytes = int(config.get('max_size_mb', 2048) * 1024 * 1024)
+        self.max_age = config.get('max_age_days', 30) * 86400
+        self.variants_per_key = config.get('variants_per_key', 5)
+        self.evict_every = config.get('evict_every', 50)
+
+        self._puts = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _key_dir(self, provider: str, prompt: str, resolution: str) -> str:
+        key = hashlib.sha1(f"{provider}\n{prompt}\n{resolution}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _variants(self, key_dir: str):
+        try:
+            return [os.path.join(key_dir, name) for name in os.listdir(key_dir) if name.endswith('.jpg')]
+        except OSError:
+            return []
+
+    def get(self, provider: str, prompt: str, resolution: str, output_path: str,
+            exclude: Optional[Set[str]] = None) -> Optional[str]:
+        """Copy a cached variant to output_path and return its cache path, or None on a miss.
+
+        While a key has fewer than variants_per_key images, hits are served only
+        with probability count/variants_per_key so the pool keeps growing.
+        """
+        if not self.enabled:
+            return None
+
+        variants = [v for v in self._variants(self._key_dir(provider, prompt, resolution))
+                    if not exclude or v not in exclude]
+        if not variants or random.random() >= len(variants) / self.variants_per_key:
+            return None
+
+        random.shuffle(variants)
+        for variant in variants:
+            try:
+                shutil.copyfile(variant, output_path)
+                os.utime(variant)
+                return variant
+            except OSError:
+                continue  # evicted by another worker meanwhile
+        return None
+
+    def put(self, provider: str, prompt: str, resolution: str, image_path: str) -> Optional[str]:
+        """Add an image under its key; identical content is stored once"""
+        if not self.enabled:
+            return None
+
+        try:
+            key_dir = self._key_dir(provider, prompt, resolution)
+            os.makedirs(key_dir, exist_ok=True)
+
+            with open(image_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:16]
+            target = os.path.join(key_dir, f"{digest}.jpg")
+
+            if not os.path.exists(target):
+                temp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+                shutil.copyfile(image_path, temp_path)
+                os.replace(temp_path, target)
+
+                existing = sorted(self._variants(key_dir), key=self._mtime)
+                for stale in existing[:-self.variants_per_key * 2]:
+                    self._remove(stale)
+
+            with self._lock:
+                self._puts += 1
+                evict = self._puts % self.evict_every == 0
+            if evict:
+                self.evict()
+            return target
+
+        except OSError as e:
+            logger.warning(f"Image cache write failed: {e}")
+            return None
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used until under max size"""
+        if not self.enabled:
+            return
+
+        with self._file_lock() as acquired:
+            if not acquired:
+                return
+
+            now = time.time()
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith('.jpg'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if now - stat.st_mtime > self.max_age:
+                        self._remove(path)
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+
+            if removed:
+                logger.info(f"🧹 Image cache evicted {removed} files ({total / 1024 / 1024:.0f} MB left)")
+
+    @contextmanager
+    def _file_lock(self, stale_after: float = 600):
+        """Cross-process lock file; yields False if another process holds it"""
+        lock_path = os.path.join(self.directory, '.evict.lock')
+        try:
+            if time.time() - os.path.getmtime(lock_path) > stale_after:
+                self._remove(lock_path)
+        except OSError:
+            pass
+
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            yield False
+            return
+
+        try:
+            os.close(fd)
+            yield True
+        finally:
+            self._remove(lock_path)
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
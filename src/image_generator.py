@@ -1,77 +1,220 @@
 """Image Generator - Free APIs with fallback (Pollinations, Unsplash, Pexels)"""
 import os
+import json
+import shutil
 import logging
 import requests
 import time
-from typing import List, Optional
-from PIL import Image
-from io import BytesIO
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import random
 
+from src.rate_limiter import RateLimiters
+from src.http_client import get_client
+from src.image_cache import ImageCache
+from src.image_library import ImageLibrary, MANIFEST_NAME
+from src.image_utils import ImageDownloader
+from src.backgrounds import BackgroundGenerator
+from src.pexels_pool import PexelsPhotoPool
+from src.provider_router import get_router
+from src.script_generator import RESTART
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class LatencyWindow:
+    """Rolling window of successful response times for one provider"""
+    
+    def __init__(self, size: int = 100):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-1) of the window, or None with too few samples"""
+        with self._lock:
+            if len(self._samples) < 5:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
 class ImageGenerator:
     def __init__(self, config: dict):
         self.config = config
         self.image_count = config['images']['count']
         self.style = config['images']['style']
         self.pexels_api_key = os.getenv('PEXELS_API_KEY', '')
+        self.http = get_client(config.get('http'))
+        self.max_workers = config['images'].get('max_workers', 6)
+        self.limiters = RateLimiters(config['images'].get('providers', {}))
+        self.router = get_router(config.get('routing'))
+        self.size = tuple(map(int, config['video'].get('resolution', '1920x1080').split('x')))
+        self.resolution = f"{self.size[0]}x{self.size[1]}"
+        self.jpeg_quality = config['images'].get('jpeg_quality', 95)
+        self.downloader = ImageDownloader(self.http, config['images'].get('download', {}), self.size, self.jpeg_quality)
+        self.pexels_pool = PexelsPhotoPool(self.http, self.limiters, self.pexels_api_key,
+                                           config['images'].get('pexels', {}))
+        self.cache = ImageCache(config['images'].get('cache', {}))
+        self.library = ImageLibrary(config['images'].get('library', {}))
+        self.backgrounds = BackgroundGenerator(config['images'].get('fallback', {}), self.size, self.jpeg_quality)
+        
+        hedging = config['images'].get('hedging', {})
+        self.hedging = hedging.get('enabled', False)
+        self.hedge_percentile = hedging.get('percentile', 0.9)
+        self.hedge_initial_delay = hedging.get('initial_delay', 5.0)
+        self.hedge_min_delay = hedging.get('min_delay', 1.0)
+        self.hedge_max_delay = hedging.get('max_delay', 15.0)
+        self.latencies = {}
+        self.hedge_stats = {'hedged': 0, 'wasted': 0, 'wins': {}}
+        self._stats_lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=self.max_workers * 3) if self.hedging else None
     
     def generate_for_script(self, script: str, output_dir: str) -> List[str]:
         """Generate images based on script content"""
+        paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
+        return self.generate_for_paragraphs(paragraphs, output_dir)
+    
+    def generate_for_paragraphs(self, paragraphs: Iterable[str], output_dir: str) -> List[str]:
+        """Generate images from paragraphs as they arrive.
+        
+        Works on a stream (e.g. ScriptStream.subscribe()): scenes of early paragraphs
+        are already downloading while later ones are still being written. The stream
+        is read to its end even once every slot is taken, because a RESTART marker
+        means the script was replaced: pending scenes are cancelled, running ones
+        awaited, and the slots filled again from the new paragraphs.
+        """
         try:
             logger.info(f"🎨 Generating {self.image_count} images")
             
             os.makedirs(output_dir, exist_ok=True)
+            self.library.refresh()
             
-            scenes = self._parse_script_to_scenes(script)
-            prompts = self._create_image_prompts(scenes)
-            
-            image_paths = []
-            for i, prompt in enumerate(prompts[:self.image_count]):
-                logger.info(f"Generating image {i+1}/{self.image_count}")
-                
-                image_path = os.path.join(output_dir, f"image_{i+1:03d}.jpg")
+            start_time = time.time()
+            jobs = []
+            futures = []
+            run = {'used': set(), 'hashes': []}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                def submit(prompt: str):
+                    jobs.append((len(jobs), prompt))
+                    self.pexels_pool.set_demand(p for _, p in jobs)
+                    futures.append(executor.submit(self._generate_indexed, len(jobs) - 1, prompt, output_dir, run))
                 
-                success = self._generate_single_image(prompt, image_path)
+                try:
+                    for paragraph in paragraphs:
+                        if paragraph is RESTART:
+                            for future in futures:
+                                future.cancel()
+                            wait(futures)
+                            logger.info(f"🔄 Script restarted, dropping {len(jobs)} queued scenes")
+                            jobs.clear()
+                            futures.clear()
+                            continue
+                        for scene in self._paragraph_scenes(paragraph):
+                            if len(jobs) < self.image_count:
+                                submit(self._scene_prompt(scene))
+                except Exception:
+                    # The script failed or was rejected: don't download the rest of its scenes
+                    for future in futures:
+                        future.cancel()
+                    raise
                 
-                if success:
-                    image_paths.append(image_path)
-                else:
-                    logger.warning(f"Failed to generate image {i+1}, using fallback")
-                    fallback_path = self._get_fallback_image(prompt, image_path)
-                    if fallback_path:
-                        image_paths.append(fallback_path)
+                while len(jobs) < self.image_count:
+                    submit(self._filler_prompt())
                 
-                time.sleep(0.5)
+                results = [future.result() for future in futures]
+            
+            image_paths = [path for path, _ in results if path]
+            self._record_manifest(output_dir, jobs, results)
+            if self.pexels_api_key:
+                self.pexels_pool.save()
+                logger.info(f"🔎 Pexels search calls so far: {self.pexels_pool.search_calls}")
             
-            logger.info(f"✅ Generated {len(image_paths)} images")
+            logger.info(f"✅ Generated {len(image_paths)} images in {time.time() - start_time:.1f}s")
+            if self.hedging:
+                logger.info(f"🏁 Hedging: {self.hedge_stats['hedged']} hedges, "
+                            f"{self.hedge_stats['wasted']} wasted requests, wins {self.hedge_stats['wins']}")
             return image_paths
             
         except Exception as e:
             logger.error(f"❌ Image generation failed: {e}")
             raise
     
+    def discard(self, output_dir: str):
+        """Delete a video's images and drop them from the library, e.g. when its script was rejected"""
+        dropped = self.library.forget_dir(output_dir)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        self.library.save()
+        logger.info(f"🗑️ Discarded images in {output_dir} ({dropped} library entries)")
+    
+    def _generate_indexed(self, i: int, prompt: str, output_dir: str,
+                          run: Optional[Dict] = None) -> Tuple[Optional[str], str]:
+        """Generate image number i (0-based) into its fixed image_NNN.jpg slot; returns (path, source)"""
+        logger.info(f"Generating image {i+1}/{self.image_count}")
+        
+        image_path = os.path.join(output_dir, f"image_{i+1:03d}.jpg")
+        
+        source = self._generate_single_image(prompt, image_path, run)
+        if source:
+            return image_path, source
+        
+        logger.warning(f"Failed to generate image {i+1}, using fallback")
+        return self._get_fallback_image(prompt, image_path), 'fallback'
+    
+    def _record_manifest(self, output_dir: str, jobs: List[Tuple[int, str]], results: List[Tuple[Optional[str], str]]):
+        """Write prompts.json for the library and index newly downloaded images"""
+        manifest = {}
+        for (_, prompt), (path, source) in zip(jobs, results):
+            if not path:
+                continue
+            manifest[os.path.basename(path)] = {'prompt': prompt, 'source': source}
+            if source not in ('fallback', 'library'):
+                self.library.add(path, prompt)
+        
+        try:
+            with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            self.library.save()
+        except OSError as e:
+            logger.warning(f"Could not write image manifest: {e}")
+    
     def _parse_script_to_scenes(self, script: str) -> List[str]:
         """Parse script into scenes"""
         paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
         
         scenes = []
         for para in paragraphs:
-            if len(para) > 50:
-                sentences = para.split('.')
-                for sentence in sentences:
-                    if len(sentence.strip()) > 30:
-                        scenes.append(sentence.strip())
+            scenes.extend(self._paragraph_scenes(para))
         
         return scenes
     
+    def _paragraph_scenes(self, para: str) -> List[str]:
+        """Scenes (longer sentences) of one paragraph"""
+        scenes = []
+        if len(para) > 50:
+            sentences = para.split('.')
+            for sentence in sentences:
+                if len(sentence.strip()) > 30:
+                    scenes.append(sentence.strip())
+        return scenes
+    
     def _create_image_prompts(self, scenes: List[str]) -> List[str]:
         """Create image prompts from scenes"""
-        prompts = []
+        prompts = [self._scene_prompt(scene) for scene in scenes]
+        
+        while len(prompts) < self.image_count:
+            prompts.append(self._filler_prompt())
         
+        return prompts
+    
+    def _scene_prompt(self, scene: str) -> str:
+        """Image prompt for one scene"""
         keywords_map = {
             'psychology': ['brain', 'mind', 'thinking person', 'silhouette', 'abstract mind'],
             'dark': ['moody lighting', 'shadows', 'dramatic', 'noir'],
@@ -83,105 +226,194 @@ class ImageGenerator:
             'story': ['person', 'emotion', 'dramatic scene', 'narrative']
         }
         
-        for scene in scenes:
-            scene_lower = scene.lower()
-            
-            matched_keywords = []
-            for key, values in keywords_map.items():
-                if key in scene_lower:
-                    matched_keywords.extend(values)
-            
-            if matched_keywords:
-                subject = random.choice(matched_keywords)
-            else:
-                subject = random.choice(['abstract concept', 'dramatic scene', 'cinematic shot'])
-            
-            prompt = f"{subject}, {self.style}"
-            prompts.append(prompt)
+        scene_lower = scene.lower()
         
-        while len(prompts) < self.image_count:
-            prompts.append(f"{random.choice(['abstract', 'dramatic', 'cinematic'])} scene, {self.style}")
+        matched_keywords = []
+        for key, values in keywords_map.items():
+            if key in scene_lower:
+                matched_keywords.extend(values)
         
-        return prompts
+        if matched_keywords:
+            subject = random.choice(matched_keywords)
+        else:
+            subject = random.choice(['abstract concept', 'dramatic scene', 'cinematic shot'])
+        
+        return f"{subject}, {self.style}"
     
-    def _generate_single_image(self, prompt: str, output_path: str) -> bool:
-        """Generate single image with fallback providers"""
-        if self._generate_pollinations(prompt, output_path):
-            return True
+    def _filler_prompt(self) -> str:
+        """Prompt for slots beyond the script's scenes"""
+        return f"{random.choice(['abstract', 'dramatic', 'cinematic'])} scene, {self.style}"
+    
+    def _image_providers(self) -> List[Tuple[str, Callable]]:
+        """Providers ordered by the router's expected time-to-success"""
+        providers = [
+            ('pollinations', self._generate_pollinations),
+            ('unsplash', self._generate_unsplash)
+        ]
+        if self.pexels_api_key:
+            providers.append(('pexels', self._generate_pexels))
+        
+        functions = dict(providers)
+        return [(name, functions[name]) for name in self.router.order('images', [n for n, _ in providers])]
+    
+    def _generate_single_image(self, prompt: str, output_path: str, run: Optional[Dict] = None) -> Optional[str]:
+        """Fill one scene from the local library, the cache, or the providers; returns the source used"""
+        run = run if run is not None else {'used': set(), 'hashes': []}
+        providers = self._image_providers()
         
-        if self._generate_unsplash(prompt, output_path):
-            return True
+        with self._stats_lock:
+            used, hashes = set(run['used']), list(run['hashes'])
         
-        if self.pexels_api_key and self._generate_pexels(prompt, output_path):
-            return True
+        local = self.library.lookup(prompt, used, hashes, exclude_dir=os.path.dirname(output_path))
+        if local and self.library.use(local, output_path):
+            with self._stats_lock:
+                run['used'].add(local)
+                run['hashes'].append(self.library.phash_of(local))
+            return 'library'
         
-        return False
+        for name, _ in providers:
+            cached = self.cache.get(name, prompt, self.resolution, output_path, used)
+            if cached:
+                with self._stats_lock:
+                    run['used'].add(cached)
+                return 'cache'
+        
+        if self.hedging:
+            winner = self._generate_hedged(prompt, output_path, providers)
+        else:
+            winner = None
+            for name, generate in providers:
+                if self._timed(name, generate, prompt, output_path):
+                    winner = name
+                    break
+        
+        if winner:
+            self.cache.put(winner, prompt, self.resolution, output_path)
+        return winner
+    
+    def _timed(self, name: str, generate: Callable, prompt: str, output_path: str,
+               cancel: Optional[threading.Event] = None) -> bool:
+        """Run one provider, recording the outcome with the router and its latency when it succeeds"""
+        start = time.perf_counter()
+        ok = generate(prompt, output_path, cancel)
+        elapsed = time.perf_counter() - start
+        
+        if ok or not (cancel and cancel.is_set()):
+            # A hedge loser that was cancelled says nothing about the provider's health
+            self.router.record('images', name, ok, elapsed)
+        if ok:
+            with self._stats_lock:
+                window = self.latencies.setdefault(name, LatencyWindow())
+            window.add(elapsed)
+        return ok
     
-    def _generate_pollinations(self, prompt: str, output_path: str) -> bool:
+    def _hedge_delay(self, name: str) -> float:
+        """How long to wait on a provider before starting the next one"""
+        window = self.latencies.get(name)
+        observed = window.percentile(self.hedge_percentile) if window else None
+        delay = observed if observed is not None else self.hedge_initial_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, delay))
+    
+    def _generate_hedged(self, prompt: str, output_path: str, providers: List[Tuple[str, Callable]]) -> Optional[str]:
+        """Start the next provider whenever the current one is slower than usual; first valid image wins"""
+        cancel = threading.Event()
+        remaining = list(providers)
+        pending = {}
+        winner = None
+        launch_next = True
+        
+        while not winner and (remaining or pending):
+            if launch_next and remaining:
+                name, generate = remaining.pop(0)
+                part_path = f"{output_path}.{name}.part"
+                future = self._hedge_executor.submit(self._timed, name, generate, prompt, part_path, cancel)
+                pending[future] = (name, part_path)
+                last_name = name
+            
+            timeout = self._hedge_delay(last_name) if remaining else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                launch_next = True
+                with self._stats_lock:
+                    self.hedge_stats['hedged'] += 1
+                continue
+            
+            launch_next = False
+            for future in done:
+                name, part_path = pending.pop(future)
+                if not winner and future.result():
+                    winner = (name, part_path)
+                else:
+                    self._discard(part_path)
+                    launch_next = True
+        
+        if not winner:
+            return None
+        
+        cancel.set()
+        for future, (_, part_path) in pending.items():
+            future.add_done_callback(lambda _, path=part_path: self._discard(path))
+        
+        name, part_path = winner
+        os.replace(part_path, output_path)
+        with self._stats_lock:
+            self.hedge_stats['wasted'] += len(pending)
+            self.hedge_stats['wins'][name] = self.hedge_stats['wins'].get(name, 0) + 1
+        return name
+    
+    def _discard(self, path: str):
+        """Remove a losing attempt's partial file"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def _generate_pollinations(self, prompt: str, output_path: str, cancel: Optional[threading.Event] = None) -> bool:
         """Generate using Pollinations.ai (free, unlimited)"""
         try:
             encoded_prompt = requests.utils.quote(prompt)
-            url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1920&height=1080&nologo=true"
-            
-            response = requests.get(url, timeout=30)
+            # Same URL, same image: a fresh seed makes each cache miss add a new variant for the prompt
+            seed = random.randint(0, 2**31 - 1)
+            url = (f"https://image.pollinations.ai/prompt/{encoded_prompt}"
+                   f"?width={self.size[0]}&height={self.size[1]}&nologo=true&seed={seed}")
             
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
-                img = img.resize((1920, 1080), Image.Resampling.LANCZOS)
-                img = img.convert('RGB')
-                img.save(output_path, 'JPEG', quality=95)
-                return True
+            with self.limiters.slot('pollinations'):
+                return self.downloader.fetch(url, output_path, cancel, timeout=30,
+                                             before_retry=lambda: self.limiters.token('pollinations'))
                 
         except Exception as e:
             logger.error(f"Pollinations error: {e}")
         
         return False
     
-    def _generate_unsplash(self, prompt: str, output_path: str) -> bool:
+    def _generate_unsplash(self, prompt: str, output_path: str, cancel: Optional[threading.Event] = None) -> bool:
         """Generate using Unsplash Source (free stock photos)"""
         try:
             keywords = prompt.split(',')[0].strip().replace(' ', ',')
-            url = f"https://source.unsplash.com/1920x1080/?{keywords}"
+            url = f"https://source.unsplash.com/{self.resolution}/?{keywords}"
             
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
-                img = img.resize((1920, 1080), Image.Resampling.LANCZOS)
-                img = img.convert('RGB')
-                img.save(output_path, 'JPEG', quality=95)
-                return True
+            with self.limiters.slot('unsplash'):
+                return self.downloader.fetch(url, output_path, cancel, timeout=30,
+                                             before_retry=lambda: self.limiters.token('unsplash'))
                 
         except Exception as e:
             logger.error(f"Unsplash error: {e}")
         
         return False
     
-    def _generate_pexels(self, prompt: str, output_path: str) -> bool:
+    def _generate_pexels(self, prompt: str, output_path: str, cancel: Optional[threading.Event] = None) -> bool:
         """Generate using Pexels API (free, 200/hour)"""
         if not self.pexels_api_key:
             return False
         
         try:
-            query = prompt.split(',')[0].strip()
-            
-            headers = {'Authorization': self.pexels_api_key}
-            url = f"https://api.pexels.com/v1/search?query={query}&per_page=1&orientation=landscape"
+            photo = self.pexels_pool.next_photo(PexelsPhotoPool.query_for(prompt))
             
-            response = requests.get(url, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['photos']:
-                    photo_url = data['photos'][0]['src']['large2x']
-                    
-                    img_response = requests.get(photo_url, timeout=30)
-                    if img_response.status_code == 200:
-                        img = Image.open(BytesIO(img_response.content))
-                        img = img.resize((1920, 1080), Image.Resampling.LANCZOS)
-                        img = img.convert('RGB')
-                        img.save(output_path, 'JPEG', quality=95)
-                        return True
+            if photo and not (cancel and cancel.is_set()):
+                # Ask the Pexels CDN for an exact-size crop instead of the fixed large2x rendition
+                photo_url = f"{photo['original']}?auto=compress&cs=tinysrgb&fit=crop&w={self.size[0]}&h={self.size[1]}"
+                return self.downloader.fetch(photo_url, output_path, cancel, timeout=30)
                         
         except Exception as e:
             logger.error(f"Pexels error: {e}")
@@ -189,20 +421,10 @@ class ImageGenerator:
         return False
     
     def _get_fallback_image(self, prompt: str, output_path: str) -> Optional[str]:
-        """Create solid color fallback image"""
+        """Create a procedural background in the niche's palette"""
         try:
-            colors = [
-                (20, 20, 40),
-                (40, 20, 20),
-                (20, 40, 20),
-                (30, 30, 30)
-            ]
-            
-            color = random.choice(colors)
-            img = Image.new('RGB', (1920, 1080), color)
-            img.save(output_path, 'JPEG', quality=95)
-            
-            return output_path
+            seed_text = f"{prompt}|{os.path.basename(output_path)}"
+            return self.backgrounds.create(self.config['content']['niche'], seed_text, output_path)
             
         except Exception as e:
             logger.error(f"Fallback image error: {e}")
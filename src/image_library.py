@@ -0,0 +1,266 @@
+"""Image Library - Reuse previously downloaded images via a keyword index and perceptual hashes"""
+import os
+import re
+import json
+import random
+import shutil
+import logging
+import threading
+from typing import Iterable, List, Optional, Set
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MANIFEST_NAME = 'prompts.json'
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'in', 'on', 'with', 'scene', 'shot', 'image', 'photo'}
+
+
+def dhash(path: str) -> int:
+    """64-bit difference hash; robust to resizing and recompression"""
+    with Image.open(path) as img:
+        img.draft('L', (64, 64))
+        small = img.convert('L').resize((9, 8), Image.Resampling.BOX)
+        pixels = list(small.getdata())
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class ImageLibrary:
+    """Inverted keyword index over data/images with near-duplicate detection.
+
+    Near-duplicates are found with multi-index hashing: the 64-bit hash is split
+    into four 16-bit bands, so any two hashes within 3 bits share at least one band.
+    """
+
+    BANDS = 4
+
+    def __init__(self, config: dict, root: str = 'data/images'):
+        self.enabled = config.get('enabled', True)
+        self.root = root
+        self.index_path = config.get('index_path', 'data/image_library.json')
+        self.duplicate_distance = config.get('duplicate_distance', 3)
+
+        self.images = {}      # path -> {'keywords': [...], 'phash': int, 'mtime': float}
+        self.postings = {}    # keyword -> set(paths)
+        self.bands = [{} for _ in range(self.BANDS)]  # band value -> set(paths)
+        self.dir_mtimes = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        if self.enabled:
+            self._load()
+
+    def tokenize(self, text: str) -> List[str]:
+        """Keywords from a prompt's subject (the part before the style suffix)"""
+        subject = text.split(',')[0].lower()
+        return sorted({w for w in re.findall(r'[a-z]+', subject) if len(w) > 2 and w not in STOPWORDS})
+
+    def lookup(self, prompt: str, exclude: Optional[Set[str]] = None,
+               exclude_hashes: Iterable[int] = (), exclude_dir: Optional[str] = None) -> Optional[str]:
+        """Find a stored image for a prompt, skipping excluded paths and near-duplicates"""
+        if not self.enabled:
+            return None
+
+        keywords = self.tokenize(prompt)
+        with self._lock:
+            sets = [self.postings[k] for k in keywords if k in self.postings]
+            if not sets:
+                return None
+
+            candidates = set.intersection(*sets) if len(sets) > 1 else sets[0]
+            if not candidates:
+                candidates = min(sets, key=len)
+            candidates = tuple(candidates)
+
+            exclude_hashes = list(exclude_hashes)
+            prefix = os.path.abspath(exclude_dir) + os.sep if exclude_dir else None
+            for path in random.sample(candidates, min(len(candidates), 20)):
+                if exclude and path in exclude:
+                    continue
+                if prefix and os.path.abspath(path).startswith(prefix):
+                    continue
+                phash = self.images[path]['phash']
+                if any(hamming(phash, h) <= self.duplicate_distance for h in exclude_hashes):
+                    continue
+                return path
+        return None
+
+    def use(self, path: str, output_path: str) -> bool:
+        """Copy a library image into place"""
+        try:
+            shutil.copyfile(path, output_path)
+            return True
+        except OSError:
+            self._forget(path)
+            return False
+
+    def phash_of(self, path: str) -> Optional[int]:
+        entry = self.images.get(path)
+        return entry['phash'] if entry else None
+
+    def add(self, path: str, prompt: str) -> bool:
+        """Index one image; returns False if it is a near-duplicate of an indexed image"""
+        if not self.enabled:
+            return False
+        try:
+            phash = dhash(path)
+            mtime = os.path.getmtime(path)
+        except Exception as e:
+            logger.warning(f"Could not index {path}: {e}")
+            return False
+
+        with self._lock:
+            if self._find_duplicate(phash, path):
+                return False
+            self._insert(path, self.tokenize(prompt), phash, mtime)
+            self._dirty = True
+        return True
+
+    def _find_duplicate(self, phash: int, path: str) -> Optional[str]:
+        for band, table in zip(self._band_values(phash), self.bands):
+            for other in table.get(band, ()):
+                if other != path and hamming(phash, self.images[other]['phash']) <= self.duplicate_distance:
+                    return other
+        return None
+
+    def _band_values(self, phash: int) -> List[int]:
+        return [(phash >> (16 * i)) & 0xFFFF for i in range(self.BANDS)]
+
+    def _insert(self, path: str, keywords: List[str], phash: int, mtime: float):
+        self._forget(path)
+        self.images[path] = {'keywords': keywords, 'phash': phash, 'mtime': mtime}
+        for keyword in keywords:
+            self.postings.setdefault(keyword, set()).add(path)
+        for band, table in zip(self._band_values(phash), self.bands):
+            table.setdefault(band, set()).add(path)
+
+    def _forget(self, path: str):
+        with self._lock:
+            entry = self.images.pop(path, None)
+            if not entry:
+                return
+            for keyword in entry['keywords']:
+                self.postings.get(keyword, set()).discard(path)
+            for band, table in zip(self._band_values(entry['phash']), self.bands):
+                table.get(band, set()).discard(path)
+            self._dirty = True
+
+    def forget_dir(self, directory: str) -> int:
+        """Drop every indexed image under a directory, e.g. before it is regenerated; returns images dropped"""
+        prefix = os.path.abspath(directory) + os.sep
+        with self._lock:
+            paths = [p for p in self.images if os.path.abspath(p).startswith(prefix)]
+            for path in paths:
+                self._forget(path)
+            if self.dir_mtimes.pop(directory, None) is not None:
+                self._dirty = True
+        return len(paths)
+
+    def refresh(self) -> int:
+        """Incrementally ingest images from directories whose mtime changed; returns images added"""
+        if not self.enabled or not os.path.isdir(self.root):
+            return 0
+
+        added = 0
+        directories = [self.root] + [e.path for e in os.scandir(self.root) if e.is_dir()]
+        for directory in directories:
+            mtime = os.path.getmtime(directory)
+            if self.dir_mtimes.get(directory) == mtime:
+                continue
+            added += self._ingest_dir(directory)
+            with self._lock:
+                self.dir_mtimes[directory] = mtime
+                self._dirty = True
+
+        if added:
+            logger.info(f"📚 Image library: indexed {added} new images ({len(self.images)} total)")
+        return added
+
+    def _ingest_dir(self, directory: str) -> int:
+        manifest = {}
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        fallback_prompt = os.path.basename(directory).replace('_', ' ')
+        added = 0
+        for entry in os.scandir(directory):
+            if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if entry.path in self.images:
+                continue
+
+            info = manifest.get(entry.name, {})
+            if info.get('source') == 'fallback':
+                continue
+            if self.add(entry.path, info.get('prompt', fallback_prompt)):
+                added += 1
+        return added
+
+    def save(self):
+        """Persist the index if it changed"""
+        if not self.enabled or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                'version': 1,
+                'dirs': self.dir_mtimes,
+                'images': {p: dict(e, phash=f"{e['phash']:016x}") for p, e in self.images.items()}
+            }
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.index_path)
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        self.dir_mtimes = data.get('dirs', {})
+        for path, entry in data.get('images', {}).items():
+            self._insert(path, entry['keywords'], int(entry['phash'], 16), entry['mtime'])
+        self._dirty = False
+
+
+def main():
+    """Build or update the library index and run a sample lookup"""
+    import sys
+    import time
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    library = ImageLibrary(config['images'].get('library', {}))
+    library.refresh()
+    library.save()
+    print(f"📚 {len(library.images)} images, {len(library.postings)} keywords")
+
+    prompt = sys.argv[1] if len(sys.argv) > 1 else 'brain'
+    start = time.perf_counter()
+    path = library.lookup(prompt)
+    print(f"🔎 {prompt!r} → {path} ({(time.perf_counter() - start) * 1000:.3f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Image Utils - Streaming downloads and cheap normalization of images to the video frame size"""
+import os
+import time
+import shutil
+import logging
+import threading
+from io import BytesIO
+from typing import Dict, Optional, Tuple, Union
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_image(source: Union[bytes, str], output_path: str, size: Tuple[int, int] = (1920, 1080),
+                    quality: int = 95) -> str:
+    """Write `source` (encoded bytes or a file path) to output_path as an RGB JPEG of `size`.
+
+    Returns how the image was handled: 'passthrough' when the source already is a
+    baseline RGB JPEG of the right size (bytes are copied, not re-encoded),
+    otherwise 'reencoded', 'resized' or 'draft+resized'.
+    """
+    start = time.thread_time()
+    opened = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+
+    with opened as img:
+        if img.format == 'JPEG' and img.size == size and img.mode == 'RGB':
+            if isinstance(source, bytes):
+                with open(output_path, 'wb') as f:
+                    f.write(source)
+            elif os.path.abspath(source) != os.path.abspath(output_path):
+                shutil.copyfile(source, output_path)
+            mode = 'passthrough'
+        else:
+            mode = 'reencoded'
+            if img.format == 'JPEG' and (img.width >= size[0] * 2 or img.height >= size[1] * 2):
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while staying >= the target
+                img.draft('RGB', size)
+                mode = 'draft+resized'
+
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            if img.size != size:
+                img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                mode = 'draft+resized' if mode == 'draft+resized' else 'resized'
+
+            img.save(output_path, 'JPEG', quality=quality)
+
+    logger.info(f"🖼️ {os.path.basename(output_path)}: {mode} in {(time.thread_time() - start) * 1000:.0f} ms CPU")
+    return mode
+
+
+class ImageDownloader:
+    """Streams image downloads to disk with a byte cap, checking the header as soon as it arrives.
+
+    Only the first chunks are kept in memory, and only until PIL's lazy open can
+    read format and dimensions from them (it stops at the header without allocating
+    pixel data), so memory use doesn't grow with the source size.
+    """
+
+    ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+    def __init__(self, http, config: Dict, size: Tuple[int, int] = (1920, 1080), quality: int = 95):
+        self.http = http
+        self.size = size
+        self.quality = quality
+        self.max_bytes = int(config.get('max_size_mb', 15) * 1024 * 1024)
+        self.chunk_size = int(config.get('chunk_kb', 64) * 1024)
+        self.header_bytes = int(config.get('header_kb', 512) * 1024)
+        self.max_pixels = config.get('max_megapixels', 40) * 1_000_000
+        self.min_width = config.get('min_width', size[0] // 3)
+        self.min_height = config.get('min_height', size[1] // 3)
+
+    def fetch(self, url: str, output_path: str, cancel: Optional[threading.Event] = None, **kwargs) -> bool:
+        """Download url and normalize it into output_path; False if rejected or failed"""
+        part_path = f"{output_path}.download"
+        try:
+            response = self.http.get(url, stream=True, **kwargs)
+            with response:
+                if response.status_code != 200:
+                    return False
+
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    logger.warning(f"Skipping {url[:80]}: {int(length) / 1024 / 1024:.1f} MB exceeds cap")
+                    return False
+
+                if not self._stream_to_file(response, part_path, url, cancel):
+                    return False
+
+            normalize_image(part_path, output_path, self.size, self.quality)
+            return True
+
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def _stream_to_file(self, response, part_path: str, url: str, cancel: Optional[threading.Event]) -> bool:
+        """Write the body in chunks, aborting on cancel, size cap or an unusable header"""
+        header = bytearray()
+        header_ok = False
+        received = 0
+
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if cancel and cancel.is_set():
+                    return False
+
+                received += len(chunk)
+                if received > self.max_bytes:
+                    logger.warning(f"Aborting {url[:80]}: more than {self.max_bytes / 1024 / 1024:.0f} MB")
+                    return False
+                f.write(chunk)
+
+                if not header_ok:
+                    header += chunk
+                    image = self._read_header(bytes(header))
+                    if image is not None:
+                        if not self._usable(image, url):
+                            return False
+                        header_ok = True
+                        header = None
+                    elif received > self.header_bytes:
+                        logger.warning(f"Aborting {url[:80]}: no image header in first {received // 1024} KB")
+                        return False
+
+        return header_ok
+
+    @staticmethod
+    def _read_header(data: bytes) -> Optional[Image.Image]:
+        """Lazily open a prefix of the file; None until the header is complete"""
+        try:
+            return Image.open(BytesIO(data))
+        except Exception:
+            return None
+
+    def _usable(self, image: Image.Image, url: str) -> bool:
+        """Reject formats and dimensions that can't become a good video frame"""
+        width, height = image.size
+        if image.format not in self.ALLOWED_FORMATS:
+            reason = f"format {image.format}"
+        elif width < self.min_width or height < self.min_height:
+            reason = f"too small ({width}x{height})"
+        elif width * height > self.max_pixels:
+            reason = f"too large ({width}x{height})"
+        else:
+            return True
+
+        logger.warning(f"Aborting {url[:80]}: {reason}")
+        return False
@@ -0,0 +1,140 @@
+"""LLM Cache - Persistent cache of LLM responses keyed by provider, model, prompt and parameters"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """One JSON file per response under `dir`, expired by a per-use-case TTL.
+
+    `scope` (usually the video ID) is part of the key, so a retried video gets
+    back exactly the answers it got the first time, while a new video with the
+    same prompt still gets a fresh answer. With `bypass` set, lookups always miss
+    but fresh responses are still stored.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.bypass = config.get('bypass', False)
+        self.directory = config.get('dir', 'data/cache/llm')
+        self.ttls = {use_case: hours * 3600 for use_case, hours in config.get('ttl_hours', {}).items()}
+        self.default_ttl = config.get('default_ttl_hours', 24) * 3600
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, provider: str, model: str, prompt: str, params: Optional[Dict] = None,
+            scope: Optional[str] = None) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        material = json.dumps([provider, model, prompt_hash, params or {}, scope], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, use_case: str, key: str) -> str:
+        return os.path.join(self.directory, use_case, key[:2], f"{key}.json")
+
+    def get(self, use_case: str, provider: str, model: str, prompt: str,
+            params: Optional[Dict] = None, scope: Optional[str] = None) -> Optional[str]:
+        """Cached response, or None on a miss, expiry or bypass"""
+        if not self.enabled or self.bypass:
+            return None
+
+        path = self._path(use_case, self.key(provider, model, prompt, params, scope))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        if time.time() - entry.get('created', 0) > self.ttls.get(use_case, self.default_ttl):
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        logger.info(f"💾 LLM cache hit: {use_case} from {provider}")
+        return entry['response']
+
+    def put(self, use_case: str, provider: str, model: str, prompt: str, response: str,
+            params: Optional[Dict] = None, scope: Optional[str] = None):
+        """Store a response atomically"""
+        if not self.enabled or not response:
+            return
+
+        path = self._path(use_case, self.key(provider, model, prompt, params, scope))
+        entry = {
+            'created': time.time(),
+            'use_case': use_case,
+            'provider': provider,
+            'model': model,
+            'scope': scope,
+            'response': response
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def fetch(self, use_case: str, provider: str, model: str, prompt: str, func: Callable[[], Optional[str]],
+              params: Optional[Dict] = None, scope: Optional[str] = None) -> Optional[str]:
+        """Return the cached response or call func() and cache a non-empty result"""
+        cached = self.get(use_case, provider, model, prompt, params, scope)
+        if cached is not None:
+            return cached
+
+        response = func()
+        if response:
+            self.put(use_case, provider, model, prompt, response, params, scope)
+        return response
+
+    def prune(self) -> int:
+        """Delete expired entries; returns how many were removed"""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        now = time.time()
+        for use_case in os.listdir(self.directory):
+            ttl = self.ttls.get(use_case, self.default_ttl)
+            for root, _, files in os.walk(os.path.join(self.directory, use_case)):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        if now - os.path.getmtime(path) > ttl:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        continue
+        return removed
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache(config: Optional[Dict] = None) -> LLMCache:
+    """Return the process-wide LLM cache; the first caller's config wins"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(config)
+        return _cache
@@ -0,0 +1,52 @@
+"""LLM Endpoints - Base URLs and API keys of the script/topic providers, switchable to a local mock"""
+import os
+from typing import Dict, Optional
+
+DEFAULT_BASE_URLS = {
+    'gemini': 'https://generativelanguage.googleapis.com',
+    'ollama': 'http://localhost:11434',
+    'huggingface': 'https://api-inference.huggingface.co'
+}
+API_KEY_ENV = {
+    'gemini': 'GEMINI_API_KEY',
+    'huggingface': 'HUGGINGFACE_API_KEY'
+}
+
+
+class LLMEndpoints:
+    """Resolves where Gemini, Ollama and HuggingFace requests go.
+
+    With `mock` set, every provider points at the local mock server
+    (python -m src.mock_providers) and gets a dummy API key, so the whole
+    generation stage runs offline and real keys never leave the machine. Responses from a non-default
+    endpoint are kept apart from real ones in the LLM cache and provider stats.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.mock = config.get('mock', False)
+        overrides = config.get('base_urls') or {}
+        mock_url = config.get('mock_url', 'http://127.0.0.1:8765')
+        self.base_urls = {
+            name: (mock_url if self.mock else overrides.get(name, default)).rstrip('/')
+            for name, default in DEFAULT_BASE_URLS.items()
+        }
+
+    def url(self, provider: str, path: str) -> str:
+        return f"{self.base_urls[provider]}{path}"
+
+    def api_key(self, provider: str) -> Optional[str]:
+        """API key from the environment, or a dummy one for the mock"""
+        if self.mock:
+            return 'mock'
+        return os.getenv(API_KEY_ENV[provider])
+
+    def cache_params(self, provider: str) -> Dict:
+        """Extra LLM cache key material, empty for the default endpoint so existing entries stay valid"""
+        base_url = self.base_urls[provider]
+        return {} if base_url == DEFAULT_BASE_URLS[provider] else {'base_url': base_url}
+
+    @property
+    def router_group(self) -> str:
+        """Provider stats group, so mock latencies never reorder real providers"""
+        return 'llm-mock' if self.mock else 'llm'
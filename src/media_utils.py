@@ -0,0 +1,144 @@
+"""Media Utils - Thin helpers around the FFmpeg binary"""
+import os
+import re
+import json
+import logging
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Audio codecs that can be stream-copied into an MP4 container
+MP4_COPYABLE_AUDIO = {'aac', 'mp3'}
+
+# MP4 stream language tags are ISO 639-2 (three letters)
+ISO639_2 = {
+    'en': 'eng', 'es': 'spa', 'fr': 'fra', 'de': 'deu', 'it': 'ita', 'pt': 'por',
+    'hi': 'hin', 'ja': 'jpn', 'ko': 'kor', 'zh': 'zho', 'ru': 'rus', 'ar': 'ara',
+    'nl': 'nld', 'pl': 'pol', 'tr': 'tur', 'id': 'ind', 'ta': 'tam', 'te': 'tel'
+}
+
+
+def ffmpeg_binary() -> str:
+    """Return the FFmpeg binary MoviePy is configured with"""
+    try:
+        from moviepy.config import get_setting
+        return get_setting('FFMPEG_BINARY')
+    except Exception:
+        return 'ffmpeg'
+
+
+def run_ffmpeg(args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run FFmpeg with the given arguments, raising on failure"""
+    cmd = [ffmpeg_binary(), '-hide_banner', '-nostdin'] + args
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        tail = '\n'.join(result.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {tail}")
+    return result
+
+
+def iso639_2(language: str) -> str:
+    """Map a language code such as 'en' or 'en-US' to its ISO 639-2 form"""
+    code = language.split('-')[0].lower()
+    if len(code) == 3:
+        return code
+    return ISO639_2.get(code, 'und')
+
+
+def probe_audio_codec(path: str) -> Optional[str]:
+    """Return the codec name of the first audio stream, or None"""
+    cmd = [ffmpeg_binary(), '-hide_banner', '-nostdin', '-i', path]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    match = re.search(r'Stream #\d+:\d+.*?: Audio: (\w+)', result.stderr)
+    return match.group(1) if match else None
+
+
+def probe_duration(path: str) -> float:
+    """Return the container duration in seconds"""
+    cmd = [ffmpeg_binary(), '-hide_banner', '-nostdin', '-i', path]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    match = re.search(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', result.stderr)
+    if not match:
+        raise RuntimeError(f"could not read duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(path: str, noise_db: float = -35.0, min_duration: float = 0.3) -> List[Tuple[float, float]]:
+    """Return (start, end) pairs of silent stretches in an audio file"""
+    cmd = [
+        ffmpeg_binary(), '-hide_banner', '-nostdin', '-i', path,
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_duration}', '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    starts = [float(v) for v in re.findall(r'silence_start: (-?[\d.]+)', result.stderr)]
+    ends = [float(v) for v in re.findall(r'silence_end: (-?[\d.]+)', result.stderr)]
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
+
+
+def measure_loudness(path: str) -> Dict[str, float]:
+    """Measure EBU R128 integrated loudness and true peak in one decode pass"""
+    cmd = [
+        ffmpeg_binary(), '-hide_banner', '-nostdin', '-i', path,
+        '-af', 'ebur128=peak=true:framelog=quiet', '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    summary = result.stderr.rsplit('Summary:', 1)[-1]
+
+    integrated = re.search(r'I:\s+(-?[\d.]+|-inf) LUFS', summary)
+    peak = re.search(r'Peak:\s+(-?[\d.]+|-inf) dBFS', summary)
+    if not integrated:
+        raise RuntimeError(f"could not measure loudness of {path}")
+
+    return {
+        'integrated_lufs': float(integrated.group(1)),
+        'true_peak_dbfs': float(peak.group(1)) if peak else 0.0
+    }
+
+
+def _sidecar_path(path: str) -> str:
+    """Metadata file stored next to an audio file"""
+    return f"{path}.json"
+
+
+def load_audio_info(path: str) -> Dict:
+    """Load the sidecar metadata for an audio file, if it still matches the file"""
+    try:
+        with open(_sidecar_path(path), 'r') as f:
+            info = json.load(f)
+        stat = os.stat(path)
+        if info.get('size') == stat.st_size and info.get('mtime') == int(stat.st_mtime):
+            return info
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_audio_info(path: str, info: Dict):
+    """Write sidecar metadata for an audio file, stamped with its size and mtime"""
+    stat = os.stat(path)
+    info = dict(info, size=stat.st_size, mtime=int(stat.st_mtime))
+    temp_path = f"{_sidecar_path(path)}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(info, f, indent=2)
+    os.replace(temp_path, _sidecar_path(path))
+
+
+def get_loudness(path: str) -> Dict[str, float]:
+    """Return stored loudness for an audio file, measuring it only if never measured"""
+    info = load_audio_info(path)
+    if 'integrated_lufs' not in info:
+        logger.info(f"📏 Measuring loudness: {path}")
+        info.update(measure_loudness(path))
+        save_audio_info(path, info)
+    return {'integrated_lufs': info['integrated_lufs'], 'true_peak_dbfs': info['true_peak_dbfs']}
+
+
+def loudness_gain(loudness: Dict[str, float], target_lufs: float, max_true_peak: float = -1.0) -> float:
+    """Linear gain in dB that brings a clip to target loudness without pushing peaks over the ceiling"""
+    if loudness['integrated_lufs'] == float('-inf'):
+        return 0.0
+    gain = target_lufs - loudness['integrated_lufs']
+    return min(gain, max_true_peak - loudness['true_peak_dbfs'])
@@ -0,0 +1,303 @@
+"""Mock Providers - Local stand-in for the Gemini, Ollama and HuggingFace endpoints used for scripts and topics"""
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'latency_seconds': 0.2,
+    'chunk_delay_seconds': 0.02,
+    'chunk_words': 8,
+    'error_rate': 0.0,
+    'error_status': 503,
+    'fail': False,
+    'fail_after_chunks': None,
+    'paragraphs': 8,
+    'words': 70
+}
+# Each provider answers at its own pace and length, so races have a real leader and winner
+PROVIDER_DEFAULTS = {
+    'gemini': {'latency_seconds': 0.2, 'chunk_delay_seconds': 0.02, 'paragraphs': 8, 'words': 70},
+    'ollama': {'latency_seconds': 0.6, 'chunk_delay_seconds': 0.05, 'paragraphs': 9, 'words': 60},
+    'huggingface': {'latency_seconds': 1.0, 'paragraphs': 7, 'words': 80}
+}
+
+WORDS = (
+    'memory attention habit signal pattern choice pressure reward instinct story habitat crowd mirror '
+    'silence rhythm trust fear curiosity evidence experiment brain decision shortcut emotion stranger '
+    'routine contrast moment detail clue archive witness ledger market budget interest risk future'
+).split()
+
+
+class MockProviderServer:
+    """Threaded HTTP server speaking just enough of each provider's API.
+
+    Gemini generateContent and streamGenerateContent (SSE), Ollama /api/generate
+    (NDJSON when streaming) and HuggingFace /models/<model> are served on one
+    port. Every request waits `latency_seconds`, fails with `error_status` at
+    `error_rate` (always with `fail`), and streams `chunk_words` words per chunk,
+    cutting the stream off after `fail_after_chunks` chunks when set. Providers
+    differ by default in latency and script length (PROVIDER_DEFAULTS); top-level
+    settings apply to all of them and `providers` overrides any per provider, e.g.
+    a short `paragraphs` count to have one fail validation. Replies are canned
+    files when configured, otherwise generated deterministically from the
+    provider and prompt: a topic list for topic prompts, a structured JSON or
+    plain script of `paragraphs` paragraphs of about `words` words for scripts.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.host = config.get('host', '127.0.0.1')
+        self.port = config.get('port', 8765)
+        self.defaults = {key: config[key] for key in DEFAULTS if config.get(key) is not None}
+        self.overrides = config.get('providers') or {}
+        self.script_file = config.get('script_file')
+        self.topics_file = config.get('topics_file')
+
+        self.requests = Counter()
+        self.errors = Counter()
+        self._rng = random.Random(config.get('seed'))
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def settings(self, provider: str) -> Dict:
+        return {**DEFAULTS, **PROVIDER_DEFAULTS.get(provider, {}), **self.defaults,
+                **(self.overrides.get(provider) or {})}
+
+    def start(self) -> 'MockProviderServer':
+        """Serve from a background thread (port 0 picks a free port)"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 Mock providers listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'MockProviderServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: {'requests': self.requests[name], 'errors': self.errors[name]} for name in self.requests}
+
+    def reply(self, prompt: str, provider: str = 'gemini') -> str:
+        """Canned or generated response text for a prompt, different per provider"""
+        if 'trending topics' in prompt.lower():
+            if self.topics_file:
+                with open(self.topics_file, 'r', encoding='utf-8') as f:
+                    return f.read()
+            count = int((re.search(r'Give me (\d+)', prompt) or [None, 20])[1])
+            return self._topics(f"{provider}:{prompt}", count)
+
+        if self.script_file:
+            with open(self.script_file, 'r', encoding='utf-8') as f:
+                return f.read()
+        settings = self.settings(provider)
+        return self._script(prompt, settings['paragraphs'], settings['words'], seed=f"{provider}:{prompt}")
+
+    @staticmethod
+    def _rng_for(prompt: str) -> random.Random:
+        return random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+
+    def _topics(self, prompt: str, count: int) -> str:
+        rng = self._rng_for(prompt)
+        return '\n'.join(f"the hidden {' '.join(rng.sample(WORDS, 2))} of {rng.choice(WORDS)}" for _ in range(count))
+
+    def _script(self, prompt: str, paragraphs: int = 8, words: int = 70, seed: Optional[str] = None) -> str:
+        """A varied script of `paragraphs` paragraphs, JSON-wrapped when the prompt asks for it"""
+        rng = self._rng_for(seed or prompt)
+        body = []
+        for _ in range(paragraphs):
+            sentences, count = [], 0
+            while count < words:
+                sentence = rng.choices(WORDS, k=rng.randint(6, 14))
+                sentences.append(' '.join(sentence).capitalize() + '.')
+                count += len(sentence)
+            body.append(' '.join(sentences))
+        script = '\n\n'.join(body)
+
+        if 'Reply with only a JSON object' not in prompt:
+            return script
+        title_words = rng.sample(WORDS, 3)
+        return json.dumps({
+            'script': script,
+            'title': f"The Truth About {' '.join(w.capitalize() for w in title_words)}",
+            'description': f"A look at {', '.join(title_words)} and why it matters. Stay until the end.",
+            'chapters': [{'title': f"Part {i + 1}: {rng.choice(WORDS).capitalize()}", 'paragraph': i * 2}
+                         for i in range(max(1, paragraphs // 2))],
+            'tags': rng.sample(WORDS, 20)
+        }, indent=2)
+
+    def _count(self, provider: str, error: bool = False):
+        with self._lock:
+            self.requests[provider] += 1
+            if error:
+                self.errors[provider] += 1
+
+    def _failed(self, provider: str) -> bool:
+        settings = self.settings(provider)
+        if settings['fail']:
+            return True
+        with self._lock:
+            return self._rng.random() < settings['error_rate']
+
+    @staticmethod
+    def _chunks(text: str, words: int) -> Iterator[str]:
+        tokens = re.findall(r'\s*\S+', text)
+        for i in range(0, len(tokens), max(1, words)):
+            yield ''.join(tokens[i:i + words])
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"mock {self.address_string()} {format % args}")
+
+            def do_GET(self):
+                if urlparse(self.path).path == '/stats':
+                    self._json(200, mock.stats())
+                else:
+                    self._json(404, {'error': 'not found'})
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._json(400, {'error': 'invalid JSON'})
+
+                gemini = re.fullmatch(r'/v1beta/models/[^/:]+:(generateContent|streamGenerateContent)', path)
+                if gemini:
+                    provider, stream = 'gemini', gemini.group(1) == 'streamGenerateContent'
+                    prompt = ''.join(part.get('text', '') for content in body.get('contents', [])
+                                     for part in content.get('parts', []))
+                elif path == '/api/generate':
+                    provider, stream, prompt = 'ollama', body.get('stream', True), body.get('prompt', '')
+                elif path.startswith('/models/'):
+                    provider, stream, prompt = 'huggingface', False, body.get('inputs', '')
+                else:
+                    return self._json(404, {'error': f"unknown endpoint {path}"})
+
+                settings = mock.settings(provider)
+                time.sleep(settings['latency_seconds'])
+                if mock._failed(provider):
+                    mock._count(provider, error=True)
+                    status = settings['error_status']
+                    message = f"mock {provider} error"
+                    error = {'error': {'code': status, 'message': message}} if provider == 'gemini' else {'error': message}
+                    return self._json(status, error)
+
+                mock._count(provider)
+                text = mock.reply(prompt, provider)
+                try:
+                    if stream:
+                        self._stream(provider, text, settings)
+                    elif provider == 'gemini':
+                        self._json(200, {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]})
+                    elif provider == 'ollama':
+                        self._json(200, {'model': body.get('model'), 'response': text, 'done': True})
+                    else:
+                        self._json(200, [{'generated_text': text}])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled, e.g. a losing racer
+
+            def _stream(self, provider: str, text: str, settings: Dict):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream' if provider == 'gemini' else 'application/x-ndjson')
+                self.end_headers()
+                cutoff = settings['fail_after_chunks']
+                for i, chunk in enumerate(mock._chunks(text, settings['chunk_words'])):
+                    if cutoff is not None and i >= cutoff:
+                        mock._count(provider, error=True)
+                        self.close_connection = True
+                        return  # drop the stream mid-script, like a crashed provider
+                    if provider == 'gemini':
+                        event = {'candidates': [{'content': {'parts': [{'text': chunk}], 'role': 'model'}}]}
+                        self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8'))
+                    else:
+                        self.wfile.write((json.dumps({'response': chunk, 'done': False}) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(settings['chunk_delay_seconds'])
+                if provider == 'ollama':
+                    self.wfile.write((json.dumps({'response': '', 'done': True}) + '\n').encode('utf-8'))
+
+            def _json(self, status: int, data):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def main():
+    """Serve the mock providers, or with `bench N` time N script generations against them"""
+    import sys
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    server = MockProviderServer(config.get('mock_providers'))
+    if len(sys.argv) < 2 or sys.argv[1] != 'bench':
+        server.start()
+        print(f"🧪 Serving Gemini, Ollama and HuggingFace mocks on {server.url}")
+        print("   Set llm.mock: true in config/config.yaml to use them; Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    from src.llm_cache import get_llm_cache
+    from src.script_generator import ScriptGenerator
+
+    with open('config/prompts.yaml', 'r') as f:
+        prompts = yaml.safe_load(f)
+
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with server:
+        config['llm'] = dict(config.get('llm') or {}, mock=True, mock_url=server.url)
+        get_llm_cache(config.get('llm_cache')).bypass = True
+        generator = ScriptGenerator(config, prompts)
+        for i in range(count):
+            start = time.perf_counter()
+            metadata = generator.generate(f"mock_bench_{i}")
+            generation = metadata['generation']
+            print(f"  {i + 1}. {time.perf_counter() - start:6.2f}s  winner={generation.get('winner')}  "
+                  f"{metadata['word_count']} words  fields={generation.get('fields')}")
+        print(f"📊 {server.stats()}")
+
+
+if __name__ == '__main__':
+    main()
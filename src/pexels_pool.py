@@ -0,0 +1,128 @@
+"""Pexels Pool - One search per unique query, photos handed out to scenes without repeats"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = 'https://api.pexels.com/v1/search'
+
+
+class PexelsPhotoPool:
+    """Caches Pexels search results per query and distributes distinct photos across scenes.
+
+    The page size of a query's first search is sized from how many scenes of the
+    current script share the query and is then kept for its later pages, since a
+    page number only means the same offset at the same page size. The cursor
+    persists between videos so successive videos get different photos, and the
+    next page is fetched only when a query runs dry.
+    """
+
+    def __init__(self, http, limiters, api_key: str, config: Dict):
+        self.http = http
+        self.limiters = limiters
+        self.api_key = api_key
+        self.min_per_page = config.get('min_per_page', 15)
+        self.max_per_page = config.get('max_per_page', 80)
+        self.ttl = config.get('ttl_hours', 24) * 3600
+        self.cache_path = config.get('cache_path', 'data/cache/pexels_search.json')
+
+        self.search_calls = 0
+        self._demand = Counter()
+        self._entries = {}
+        self._query_locks = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def query_for(prompt: str) -> str:
+        """Search query used for an image prompt"""
+        return prompt.split(',')[0].strip()
+
+    def set_demand(self, prompts: Iterable[str]):
+        """Tell the pool how many scenes will ask for each query"""
+        with self._lock:
+            self._demand = Counter(self.query_for(p) for p in prompts)
+
+    def next_photo(self, query: str) -> Optional[Dict]:
+        """Return the next unused photo for a query, searching only when needed"""
+        with self._lock:
+            query_lock = self._query_locks.setdefault(query, threading.Lock())
+
+        with query_lock:
+            entry = self._entries.get(query)
+            if entry and time.time() - entry['fetched_at'] > self.ttl:
+                entry = None
+
+            if not entry or entry['cursor'] >= len(entry['photos']):
+                if entry and not entry['has_more']:
+                    entry['cursor'] = 0  # wrap around rather than search again
+                else:
+                    entry = self._search(query, entry['page'] + 1, entry['per_page']) if entry else self._search(query, 1)
+                    if not entry:
+                        return None
+                with self._lock:
+                    self._entries[query] = entry
+
+            if not entry['photos']:
+                return None
+
+            photo = entry['photos'][entry['cursor']]
+            entry['cursor'] += 1
+            return photo
+
+    def _search(self, query: str, page: int, per_page: Optional[int] = None) -> Optional[Dict]:
+        """Run one search call, sized to the current demand for this query unless per_page is given"""
+        if not per_page:
+            per_page = min(self.max_per_page, max(self.min_per_page, self._demand.get(query, 1) * 2))
+        with self.limiters.slot('pexels'):
+            response = self.http.get(
+                SEARCH_URL,
+                headers={'Authorization': self.api_key},
+                params={'query': query, 'per_page': per_page, 'page': page, 'orientation': 'landscape'},
+                timeout=30,
+                before_retry=lambda: self.limiters.token('pexels')
+            )
+        with self._lock:
+            self.search_calls += 1
+
+        if response.status_code != 200:
+            logger.warning(f"Pexels search '{query}' failed: HTTP {response.status_code}")
+            return None
+
+        data = response.json()
+        photos = [{'id': p['id'], 'original': p['src']['original']} for p in data.get('photos', [])]
+        logger.info(f"🔎 Pexels '{query}' page {page}: {len(photos)} photos")
+        return {
+            'photos': photos,
+            'cursor': 0,
+            'page': page,
+            'per_page': per_page,
+            'has_more': bool(data.get('next_page')),
+            'fetched_at': time.time()
+        }
+
+    def save(self):
+        """Persist search results and cursors"""
+        with self._lock:
+            data = {q: e for q, e in self._entries.items() if time.time() - e['fetched_at'] <= self.ttl}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save Pexels search cache: {e}")
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
@@ -0,0 +1,243 @@
+"""Provider Router - Orders fallback providers by live latency/failure stats with circuit breakers"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ProviderRouter:
+    """Tracks a rolling window of outcomes per (group, provider).
+
+    The configured order is kept, so stats never override a chosen provider (say
+    the configured voice) just because another one answered faster. Stats only
+    demote: a provider whose last attempt failed, or whose error rate over at
+    least `min_samples` attempts exceeds `max_error_rate`, moves behind the healthy
+    ones. Demoted providers are ordered by expected time-to-success, mean attempt
+    time divided by smoothed success rate. After `failure_threshold` consecutive
+    failures a provider's circuit opens and it is skipped until `cooldown_seconds`
+    pass. The circuit is then half-open: the next order() lets one trial call
+    through and every other caller keeps skipping the provider until that call
+    is recorded, or `probe_timeout_seconds` pass without it. State is persisted
+    to JSON so it survives across runs.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.state_path = config.get('state_path', 'data/provider_stats.json')
+        self.window = config.get('window', 50)
+        self.failure_threshold = config.get('failure_threshold', 3)
+        self.cooldown = config.get('cooldown_seconds', 300)
+        self.probe_timeout = config.get('probe_timeout_seconds', 60)
+        self.prior_seconds = config.get('prior_seconds', 2.0)
+        self.min_samples = config.get('min_samples', 5)
+        self.max_error_rate = config.get('max_error_rate', 0.5)
+        self.save_interval = config.get('save_interval', 30)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._last_save = time.time()
+        self._load()
+
+    def _entry(self, group: str, name: str) -> Dict:
+        key = f"{group}/{name}"
+        if key not in self._stats:
+            self._stats[key] = {
+                'outcomes': deque(maxlen=self.window),
+                'consecutive_failures': 0,
+                'opened_at': None,
+                'probe_at': None  # when a half-open circuit's trial call was handed out
+            }
+        return self._stats[key]
+
+    def expected_cost(self, group: str, name: str) -> float:
+        """Expected seconds spent per success when trying this provider"""
+        with self._lock:
+            outcomes = list(self._entry(group, name)['outcomes'])
+        successes = sum(1 for ok, _ in outcomes if ok)
+        mean_seconds = (sum(s for _, s in outcomes) + self.prior_seconds) / (len(outcomes) + 1)
+        success_rate = (successes + 1) / (len(outcomes) + 2)
+        return mean_seconds / success_rate
+
+    def is_open(self, group: str, name: str) -> bool:
+        """True while the provider's circuit is open (still cooling down)"""
+        with self._lock:
+            opened_at = self._entry(group, name)['opened_at']
+        return opened_at is not None and time.time() - opened_at < self.cooldown
+
+    def _admit(self, group: str, name: str) -> bool:
+        """False while the circuit is open or another caller holds its half-open trial call"""
+        with self._lock:
+            entry = self._entry(group, name)
+            if entry['opened_at'] is None:
+                return True
+            now = time.time()
+            if now - entry['opened_at'] < self.cooldown:
+                return False
+            if entry['probe_at'] is not None and now - entry['probe_at'] < self.probe_timeout:
+                return False
+            entry['probe_at'] = now
+        logger.info(f"🔌 {group}/{name}: circuit half-open, letting one trial call through")
+        return True
+
+    def is_demoted(self, group: str, name: str) -> bool:
+        """True if the provider's last attempt failed or it fails too often"""
+        with self._lock:
+            entry = self._entry(group, name)
+            outcomes = list(entry['outcomes'])
+            failing = entry['consecutive_failures'] > 0
+        if failing:
+            return True
+        if len(outcomes) < self.min_samples:
+            return False
+        return sum(1 for ok, _ in outcomes if not ok) / len(outcomes) > self.max_error_rate
+
+    def order(self, group: str, names: List[str]) -> List[str]:
+        """Keep the given order for healthy providers, then demoted ones by expected cost.
+
+        Open circuits are left out, and so are half-open ones whose trial call went
+        to another caller. If every provider is left out, the given order is
+        returned unchanged so callers still get a chance to succeed.
+        """
+        available = [n for n in names if self._admit(group, n)]
+        if not available:
+            return list(names)
+
+        skipped = [n for n in names if n not in available]
+        if skipped:
+            logger.debug(f"⛔ {group}: skipping {', '.join(skipped)} (circuit open or probing)")
+        healthy = [n for n in available if not self.is_demoted(group, n)]
+        demoted = sorted((n for n in available if n not in healthy),
+                         key=lambda n: (self.expected_cost(group, n), names.index(n)))
+        return healthy + demoted
+
+    def record(self, group: str, name: str, success: bool, seconds: float):
+        """Record one attempt's outcome"""
+        with self._lock:
+            entry = self._entry(group, name)
+            entry['outcomes'].append((bool(success), round(seconds, 3)))
+            entry['probe_at'] = None
+            if success:
+                entry['consecutive_failures'] = 0
+                entry['opened_at'] = None
+            else:
+                entry['consecutive_failures'] += 1
+                if entry['consecutive_failures'] >= self.failure_threshold:
+                    if entry['opened_at'] is None:
+                        logger.warning(f"⛔ {group}/{name}: circuit opened after "
+                                       f"{entry['consecutive_failures']} failures")
+                    entry['opened_at'] = time.time()
+            due = time.time() - self._last_save > self.save_interval
+
+        if due:
+            self.save()
+
+    def call(self, group: str, name: str, func: Callable, *args, **kwargs):
+        """Run a provider function, recording a truthy result as success"""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record(group, name, False, time.perf_counter() - start)
+            raise
+        self.record(group, name, bool(result), time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current stats per provider, for logs and inspection"""
+        with self._lock:
+            keys = list(self._stats)
+        report = {}
+        for key in sorted(keys):
+            group, name = key.split('/', 1)
+            with self._lock:
+                entry = self._stats[key]
+                outcomes = list(entry['outcomes'])
+                opened_at = entry['opened_at']
+            successes = sum(1 for ok, _ in outcomes if ok)
+            report[key] = {
+                'attempts': len(outcomes),
+                'error_rate': round(1 - successes / len(outcomes), 3) if outcomes else 0.0,
+                'mean_seconds': round(sum(s for _, s in outcomes) / len(outcomes), 3) if outcomes else None,
+                'expected_cost': round(self.expected_cost(group, name), 3),
+                'circuit': 'open' if opened_at and time.time() - opened_at < self.cooldown
+                           else 'half-open' if opened_at else 'closed'
+            }
+        return report
+
+    def save(self):
+        """Persist router state"""
+        with self._lock:
+            data = {
+                key: {
+                    'outcomes': list(entry['outcomes']),
+                    'consecutive_failures': entry['consecutive_failures'],
+                    'opened_at': entry['opened_at']
+                }
+                for key, entry in self._stats.items()
+            }
+            self._last_save = time.time()
+
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not save provider stats: {e}")
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for key, saved in data.items():
+            group, name = key.split('/', 1)
+            entry = self._entry(group, name)
+            entry['outcomes'].extend(tuple(o) for o in saved.get('outcomes', []))
+            entry['consecutive_failures'] = saved.get('consecutive_failures', 0)
+            entry['opened_at'] = saved.get('opened_at')
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router(config: Optional[Dict] = None) -> ProviderRouter:
+    """Return the process-wide router; the first caller's config wins"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter(config)
+        return _router
+
+
+def main():
+    """Print persisted provider stats"""
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    router = get_router(config.get('routing'))
+    snapshot = router.snapshot()
+    if not snapshot:
+        print("No provider stats recorded yet")
+        return
+
+    print(f"{'provider':<28}{'attempts':>9}{'errors':>9}{'mean s':>9}{'cost s':>9}  circuit")
+    for key, s in snapshot.items():
+        mean = f"{s['mean_seconds']:.2f}" if s['mean_seconds'] is not None else '-'
+        print(f"{key:<28}{s['attempts']:>9}{s['error_rate']:>9.0%}{mean:>9}{s['expected_cost']:>9.2f}  {s['circuit']}")
+
+
+if __name__ == '__main__':
+    main()
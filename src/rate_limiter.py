@@ -0,0 +1,104 @@
+"""Rate Limiter - Token buckets and concurrency caps for external providers"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available; returns seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+
+class ProviderLimiter:
+    """Concurrency cap plus optional token-bucket rate for one provider"""
+
+    def __init__(self, name: str, concurrency: int = 4, per_second: Optional[float] = None,
+                 burst: Optional[float] = None):
+        self.name = name
+        self._semaphore = threading.BoundedSemaphore(concurrency)
+        self._bucket = TokenBucket(per_second, burst) if per_second else None
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict) -> 'ProviderLimiter':
+        """Build from a config block with concurrency and per_second/per_minute/per_hour"""
+        per_second = config.get('per_second')
+        if per_second is None and config.get('per_minute'):
+            per_second = config['per_minute'] / 60.0
+        if per_second is None and config.get('per_hour'):
+            per_second = config['per_hour'] / 3600.0
+
+        burst = config.get('burst')
+        if burst is None and per_second:
+            burst = max(1.0, per_second * 60)
+
+        return cls(name, config.get('concurrency', 4), per_second, burst)
+
+    def token(self):
+        """Wait for one rate token without taking a concurrency slot (e.g. for a retry inside a slot)"""
+        if self._bucket:
+            waited = self._bucket.acquire()
+            if waited > 1:
+                logger.info(f"⏳ {self.name} rate limit: waited {waited:.1f}s")
+    
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot and one rate token for the duration of a call"""
+        with self._semaphore:
+            if self._bucket:
+                waited = self._bucket.acquire()
+                if waited > 1:
+                    logger.info(f"⏳ {self.name} rate limit: waited {waited:.1f}s")
+            yield
+
+
+class RateLimiters:
+    """Lazily built per-provider limiters from a config mapping"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ProviderLimiter:
+        """Return the limiter for a provider, creating it on first use"""
+        with self._lock:
+            if name not in self._limiters:
+                self._limiters[name] = ProviderLimiter.from_config(name, self.config.get(name, {}))
+            return self._limiters[name]
+
+    def slot(self, name: str):
+        """Shortcut for get(name).slot()"""
+        return self.get(name).slot()
+
+    def token(self, name: str):
+        """Shortcut for get(name).token()"""
+        self.get(name).token()
@@ -1,60 +1,324 @@
 """Script Generator - Creates engaging YouTube scripts using free AI APIs"""
 import os
+import re
 import json
+import time
+import queue
 import random
 import logging
-import requests
-from typing import Dict, List, Tuple
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import yaml
 
+from src.http_client import get_client
+from src.provider_router import get_router
+from src.llm_cache import get_llm_cache
+from src.llm_endpoints import LLMEndpoints
+from src.script_index import ScriptIndex
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+LLM_MODELS = {
+    'gemini': 'gemini-pro',
+    'ollama': 'llama2',
+    'huggingface': 'mistralai/Mistral-7B-Instruct-v0.1'
+}
+LLM_PARAMS = {
+    'huggingface': {'max_new_tokens': 2000}
+}
+
+STRUCTURED_INSTRUCTIONS = """
+
+Reply with only a JSON object with these keys, in this order:
+"script": the full narration as one string, paragraphs separated by blank lines (\\n\\n), no headings or stage directions
+"title": a YouTube title under 100 characters
+"description": a 2-4 sentence video description, no hashtags or timestamps
+"chapters": a list of 4-8 objects {"title": chapter title, "paragraph": index of the script paragraph where it starts}, the first at paragraph 0
+"tags": a list of 15-30 short search tags"""
+
+
+# Marker in a paragraph stream: drop the paragraphs received so far, the script starts over
+RESTART = object()
+
+
+def split_paragraphs(chunks: Iterable[str]) -> Iterator[str]:
+    """Regroup streamed text chunks into paragraphs, yielding each once it is complete"""
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        parts = re.split(r'\n\s*\n', buffer)
+        buffer = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+class DuplicateScriptError(RuntimeError):
+    """The generated script is a near-duplicate of an earlier video"""
+
+
+class ScriptFieldExtractor:
+    """Decodes the "script" string of a JSON reply while the reply is still streaming.
+    
+    Replies that don't start with '{' (or a code fence) are passed through as plain
+    text, so a model that ignores the JSON instruction still yields its script.
+    """
+    
+    _START = re.compile(r'"script"\s*:\s*"')
+    _ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+    
+    def __init__(self):
+        self.raw = ''
+        self.mode = None
+        self._pos = None
+        self._closed = False
+    
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of the reply; returns the newly decoded script text"""
+        self.raw += chunk
+        if self.mode is None:
+            stripped = self.raw.lstrip()
+            if not stripped:
+                return ''
+            self.mode = 'json' if stripped[0] in '{`' else 'text'
+        
+        if self.mode == 'text':
+            text, self._pos = self.raw[self._pos or 0:], len(self.raw)
+            return text
+        
+        if self._closed:
+            return ''
+        if self._pos is None:
+            match = self._START.search(self.raw)
+            if not match:
+                return ''
+            self._pos = match.end()
+        
+        raw, i, out = self.raw, self._pos, []
+        while i < len(raw):
+            char = raw[i]
+            if char == '"':
+                self._closed = True
+                i += 1
+                break
+            if char != '\\':
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(raw):
+                break
+            if raw[i + 1] != 'u':
+                out.append(self._ESCAPES.get(raw[i + 1], raw[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(raw):
+                break
+            code = int(raw[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                if i + 12 > len(raw):
+                    break
+                low = int(raw[i + 8:i + 12], 16)
+                code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                i += 6
+            out.append(chr(code))
+            i += 6
+        
+        self._pos = i
+        return ''.join(out)
+    
+    def fields(self) -> Dict:
+        """All fields of the finished JSON reply, or {} if it isn't valid JSON"""
+        if self.mode != 'json':
+            return {}
+        start, end = self.raw.find('{'), self.raw.rfind('}')
+        try:
+            data = json.loads(self.raw[start:end + 1])
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+class ScriptStream:
+    """A script being generated: paragraphs go to subscribers as they complete.
+    
+    Subscribe before calling run(); run() pulls the paragraphs, fans them out to
+    every subscriber and returns the finished metadata. When the streamed racer
+    loses, subscribers receive RESTART and then the final script from its first
+    paragraph, so anything built from earlier paragraphs must be discarded.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, paragraphs: Iterator[str], finish: Callable[[str], Dict]):
+        self._source = paragraphs
+        self._finish = finish
+        self._subscribers = []
+        self.paragraphs = []
+        self.metadata = None
+    
+    def subscribe(self) -> Iterator:
+        """An iterator over the paragraphs (and RESTART markers), safe to consume from another thread"""
+        channel = queue.Queue()
+        self._subscribers.append(channel)
+        
+        def consume():
+            while True:
+                item = channel.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        return consume()
+    
+    def run(self) -> Dict:
+        """Generate the whole script, feeding subscribers along the way"""
+        end = self._DONE
+        try:
+            for paragraph in self._source:
+                if paragraph is RESTART:
+                    self.paragraphs = []
+                else:
+                    self.paragraphs.append(paragraph)
+                for channel in self._subscribers:
+                    channel.put(paragraph)
+            self.metadata = self._finish('\n\n'.join(self.paragraphs))
+            return self.metadata
+        except Exception as e:
+            end = RuntimeError(f"Script generation failed: {e}")
+            raise
+        finally:
+            for channel in self._subscribers:
+                channel.put(end)
+
 
 class ScriptGenerator:
     def __init__(self, config: Dict, prompts: Dict):
         self.config = config
         self.prompts = prompts
         self.niche = config['content']['niche']
+        self.http = get_client(config.get('http'))
+        self.router = get_router(config.get('routing'))
+        self.llm_cache = get_llm_cache(config.get('llm_cache'))
+        self.endpoints = LLMEndpoints(config.get('llm'))
+        script_config = config.get('script', {})
+        self.streaming = script_config.get('streaming', True)
+        self.deadline_seconds = script_config.get('deadline_seconds', 90)
+        self.stagger_seconds = script_config.get('stagger_seconds', 10)
+        self.min_words = script_config.get('min_words', 400)
+        self.min_paragraphs = script_config.get('min_paragraphs', 5)
+        self.structured = script_config.get('structured', True)
+        duplicates = script_config.get('duplicates', {})
+        self.index = ScriptIndex(duplicates)
+        self.max_attempts = duplicates.get('max_attempts', 3)
+        self.topic_attempts = duplicates.get('topic_attempts', 5)
         
-    def generate(self) -> Dict[str, str]:
-        """Generate complete script with metadata"""
+    def generate(self, video_id: str = None, first_attempt: int = 0) -> Dict[str, str]:
+        """Generate complete script with metadata.
+        
+        Passing the same video_id again (a retry) reuses the topic and LLM responses
+        of the earlier attempt from the LLM cache. A script that near-duplicates an
+        earlier video is rejected and another topic is tried, up to max_attempts.
+        """
         try:
-            logger.info(f"🎬 Generating script for niche: {self.niche}")
-            
-            topic = self._select_topic()
-            script = self._generate_script(topic)
-            title = self._generate_title(topic)
-            description = self._generate_description(title, script)
-            tags = self._generate_tags(topic, title)
-            
-            metadata = {
-                'title': title,
-                'script': script,
-                'description': description,
-                'tags': tags,
-                'topic': topic,
-                'niche': self.niche,
-                'timestamp': datetime.now().isoformat(),
-                'word_count': len(script.split())
-            }
-            
-            logger.info(f"✅ Script generated: {len(script.split())} words")
-            return metadata
+            for attempt in range(first_attempt, self.max_attempts):
+                try:
+                    return self.stream(video_id, attempt).run()
+                except DuplicateScriptError as e:
+                    logger.warning(f"🧬 {e}, trying another topic")
+            raise DuplicateScriptError(f"No original script after {self.max_attempts} attempts")
             
         except Exception as e:
             logger.error(f"❌ Script generation failed: {e}")
             raise
     
-    def _select_topic(self) -> str:
-        """Select trending topic using Gemini or fallback to random"""
-        gemini_key = os.getenv('GEMINI_API_KEY')
-        if gemini_key:
+    def stream(self, video_id: str = None, attempt: int = 0) -> 'ScriptStream':
+        """Start a script whose paragraphs can be consumed while it is still being generated.
+        
+        run() raises DuplicateScriptError if the finished script near-duplicates an
+        earlier video; a later attempt number picks a different topic.
+        """
+        logger.info(f"🎬 Generating script for niche: {self.niche}")
+        
+        scope = f"{video_id}#{attempt}" if video_id and attempt else video_id
+        topic = self._pick_topic(scope, video_id)
+        race = {}
+        return ScriptStream(self._script_paragraphs(topic, scope, race),
+                            lambda script: self._build_metadata(topic, script, race, video_id))
+    
+    def _pick_topic(self, scope: str = None, video_id: str = None) -> str:
+        """Select a topic, skipping candidates too close to a recent video's topic"""
+        self.index.refresh()
+        for i in range(self.topic_attempts):
+            topic = self._select_topic(f"{scope}~{i}" if scope and i else scope)
+            match = self.index.similar_topic(topic, video_id)
+            if not match:
+                return topic
+            logger.info(f"🧬 Topic '{topic}' is too close to earlier '{match[0]}' ({match[1]} bits)")
+        
+        logger.warning(f"🧬 No fresh topic in {self.topic_attempts} tries, using '{topic}'")
+        return topic
+    
+    def _build_metadata(self, topic: str, script: str, generation: Optional[Dict] = None,
+                        video_id: str = None) -> Dict:
+        """Title, description and tags for a finished script.
+        
+        Fields the LLM returned alongside the script are used when they pass
+        validation; each missing or invalid one falls back to its template.
+        """
+        generation = generation if generation is not None else {}
+        fields = generation.pop('fields', None) or {}
+        
+        title = self._clean_title(fields.get('title'))
+        chapters = self._chapter_lines(fields.get('chapters'), script)
+        summary = self._clean_summary(fields.get('description'))
+        tags = self._clean_tags(fields.get('tags'))
+        generation['fields'] = {
+            'title': 'llm' if title else 'template',
+            'description': 'llm' if summary else 'template',
+            'chapters': 'llm' if chapters else 'template',
+            'tags': 'llm' if tags else 'template'
+        }
+        
+        title = title or self._generate_title(topic)
+        # Template scripts of one niche share most of their wording, so only their topic is checked
+        match = None
+        if generation.get('winner') != 'template':
+            match = self.index.similar_script(title, script, video_id)
+        if match:
+            raise DuplicateScriptError(f"Script is {match[1]:.0%} similar to {os.path.basename(match[0])}")
+        
+        description = self._generate_description(title, script, summary, chapters)
+        tags = tags or self._generate_tags(topic, title)
+        
+        metadata = {
+            'video_id': video_id,
+            'title': title,
+            'script': script,
+            'description': description,
+            'tags': tags,
+            'chapters': chapters or [],
+            'topic': topic,
+            'niche': self.niche,
+            'timestamp': datetime.now().isoformat(),
+            'word_count': len(script.split()),
+            'generation': generation or {}
+        }
+        
+        logger.info(f"✅ Script generated: {len(script.split())} words")
+        return metadata
+    
+    def _select_topic(self, video_id: str = None) -> str:
+        """Select trending topic using Gemini or fallback to random (stable per video_id)"""
+        if self.endpoints.api_key('gemini'):
             try:
                 from src.trending_topics import TrendingTopicsFetcher
-                fetcher = TrendingTopicsFetcher()
-                topic = fetcher.get_trending_topic(self.niche)
+                fetcher = TrendingTopicsFetcher(self.config)
+                topic = fetcher.get_trending_topic(self.niche, scope=video_id)
                 if topic:
                     logger.info(f"Using trending topic: {topic}")
                     return topic
@@ -62,45 +326,191 @@ class ScriptGenerator:
                 logger.warning(f"Trending topic fetch failed: {e}")
         
         topics = self.prompts[self.niche]['topics']
-        return random.choice(topics)
+        rng = random.Random(video_id) if video_id else random
+        return rng.choice(topics)
     
-    def _generate_script(self, topic: str) -> str:
-        """Generate script using free AI or template-based approach"""
-        try:
-            script = self._generate_with_gemini(topic)
-            if script:
-                return script
-        except:
-            pass
+    def _script_paragraphs(self, topic: str, scope: str = None, race: Optional[Dict] = None) -> Iterator:
+        """Race the LLM providers under one deadline and yield the winner's paragraphs.
         
-        try:
-            script = self._generate_with_ollama(topic)
-            if script:
-                return script
-        except:
-            pass
+        The best-ranked provider starts first and the next one joins every
+        `stagger_seconds`, or at once when a racer fails. The first complete script
+        that passes validation wins and the rest are cancelled. When the deadline
+        passes, the template script is used. Paragraphs are yielded early from the
+        racer that produced one first. If that racer is rejected or loses, RESTART
+        is yielded and the paragraphs start over from the new leader, the winner or
+        the template, so the yielded script is always exactly the validated one.
+        `race` receives the winner and per-provider timings.
+        """
+        race = race if race is not None else {}
+        if self.streaming:
+            providers = {'ollama': self._stream_ollama}
+            if self.endpoints.api_key('gemini'):
+                providers['gemini'] = self._stream_gemini
+        else:
+            providers = {'ollama': self._whole(self._generate_with_ollama)}
+            if self.endpoints.api_key('gemini'):
+                providers['gemini'] = self._whole(self._generate_with_gemini)
+        if self.endpoints.api_key('huggingface'):
+            providers['huggingface'] = self._whole(self._generate_with_huggingface)
+        
+        prompt = self.prompts[self.niche]['script_prompt'].format(topic=topic)
+        if self.structured:
+            prompt += STRUCTURED_INSTRUCTIONS
+        params = {name: dict(LLM_PARAMS.get(name, {}), structured=self.structured, **self.endpoints.cache_params(name))
+                  for name in providers}
+        default_order = [n for n in ('gemini', 'ollama', 'huggingface') if n in providers]
+        order = self.router.order(self.endpoints.router_group, default_order)
+        race.update({'winner': None, 'cached': False, 'seconds': None, 'providers': {}})
+        
+        # Look for any provider's earlier answer first so cache hits don't skew the router's stats
+        for name in order:
+            cached = self.llm_cache.get('script', name, LLM_MODELS[name], prompt, params[name], scope)
+            if cached:
+                extractor = ScriptFieldExtractor()
+                paragraphs = list(split_paragraphs([extractor.feed(cached)]))
+                race.update({'winner': name, 'cached': True, 'seconds': 0.0, 'fields': extractor.fields()})
+                yield from paragraphs
+                return
+        
+        start = time.perf_counter()
+        deadline = start + self.deadline_seconds
+        events = queue.Queue()
+        cancel = threading.Event()
+        pending = list(order)
+        running = {}      # name -> start time
+        buffers = {}      # name -> paragraphs so far
+        leader = None
+        emitted = 0
+        winner_script = None
+        
+        def launch(name: str):
+            running[name] = time.perf_counter()
+            buffers[name] = []
+            threading.Thread(target=self._race_provider, args=(name, providers[name], prompt, events, cancel),
+                             daemon=True).start()
+        
+        def finish(name: str, status: str, detail: Optional[str] = None):
+            elapsed = time.perf_counter() - running.pop(name)
+            race['providers'][name] = {'status': status, 'seconds': round(elapsed, 2),
+                                       'words': len(' '.join(buffers[name]).split())}
+            if detail:
+                race['providers'][name]['detail'] = detail
+            if status != 'cancelled':
+                self.router.record(self.endpoints.router_group, name, status == 'won', elapsed)
         
         try:
-            script = self._generate_with_huggingface(topic)
-            if script:
-                return script
-        except:
-            pass
+            next_launch = time.perf_counter()
+            while True:
+                now = time.perf_counter()
+                if pending and (now >= next_launch or not running):
+                    launch(pending.pop(0))
+                    next_launch = now + self.stagger_seconds
+                if not running:
+                    break
+                
+                wait_until = min(deadline, next_launch) if pending else deadline
+                try:
+                    kind, name, value = events.get(timeout=max(0.0, wait_until - time.perf_counter()))
+                except queue.Empty:
+                    if time.perf_counter() >= deadline:
+                        logger.warning(f"⏱️ Script deadline of {self.deadline_seconds}s reached")
+                        break
+                    continue
+                
+                if name not in running:
+                    continue
+                if kind == 'paragraph':
+                    buffers[name].append(value)
+                    leader = leader or name
+                    if name == leader and len(buffers[name]) > emitted:
+                        emitted += 1
+                        yield value
+                    continue
+                
+                problem = value if kind == 'error' else self._validate_script(buffers[name])
+                if problem:
+                    logger.warning(f"{name} script rejected: {problem}")
+                    finish(name, 'failed', problem)
+                    next_launch = time.perf_counter()
+                    if name == leader:
+                        leader = max(running, key=lambda n: len(buffers[n]), default=None)
+                        if emitted:
+                            logger.info(f"🔄 Restarting the streamed script from {leader or 'the next racer'}")
+                            emitted = 0
+                            yield RESTART
+                        for paragraph in (buffers[leader] if leader else []):
+                            emitted += 1
+                            yield paragraph
+                    continue
+                
+                winner_script = buffers[name]
+                race['winner'] = name
+                race['fields'] = value.fields()
+                finish(name, 'won')
+                if name != leader and emitted:
+                    logger.info(f"🔄 Restarting the streamed script from winner {name}")
+                    emitted = 0
+                    yield RESTART
+                for paragraph in winner_script[emitted:]:
+                    emitted += 1
+                    yield paragraph
+                self.llm_cache.put('script', name, LLM_MODELS[name], prompt, value.raw, params[name], scope)
+                return
+        finally:
+            cancel.set()
+            for name in list(running):
+                finish(name, 'cancelled')
+            for name in pending:
+                race['providers'][name] = {'status': 'not started'}
+            race['seconds'] = round(time.perf_counter() - start, 2)
+            if winner_script is not None:
+                logger.info(f"🏁 Script from {race['winner']} in {race['seconds']}s")
         
-        return self._generate_template_based(topic)
+        race['winner'] = 'template'
+        if emitted:
+            yield RESTART
+        yield from split_paragraphs([self._generate_template_based(topic)])
+    
+    def _race_provider(self, name: str, provider: Callable[[str], Iterator[str]], prompt: str,
+                       events: queue.Queue, cancel: threading.Event):
+        """Run one racer, reporting paragraphs, completion (with the raw reply) or failure as events"""
+        extractor = ScriptFieldExtractor()
+        try:
+            for paragraph in split_paragraphs(extractor.feed(chunk) for chunk in provider(prompt)):
+                if cancel.is_set():
+                    return
+                events.put(('paragraph', name, paragraph))
+            events.put(('done', name, extractor))
+        except Exception as e:
+            events.put(('error', name, str(e)))
+    
+    def _validate_script(self, paragraphs: List[str]) -> Optional[str]:
+        """Why a finished script is unusable, or None if it passes"""
+        words = len(' '.join(paragraphs).split())
+        if words < self.min_words:
+            return f"{words} words (< {self.min_words})"
+        if len(paragraphs) < self.min_paragraphs:
+            return f"{len(paragraphs)} paragraphs (< {self.min_paragraphs})"
+        return None
     
-    def _generate_with_gemini(self, topic: str) -> str:
+    @staticmethod
+    def _whole(generate: Callable[[str], Optional[str]]) -> Callable[[str], Iterator[str]]:
+        """Adapt a non-streaming provider to the chunk-iterator interface"""
+        def chunks(prompt: str) -> Iterator[str]:
+            text = generate(prompt)
+            if text:
+                yield text
+        return chunks
+    
+    def _generate_with_gemini(self, prompt: str) -> str:
         """Try Google Gemini API (free tier - best quality)"""
-        api_key = os.getenv('GEMINI_API_KEY')
+        api_key = self.endpoints.api_key('gemini')
         if not api_key:
             return None
         
         try:
-            prompt_template = self.prompts[self.niche]['script_prompt']
-            prompt = prompt_template.format(topic=topic)
-            
-            response = requests.post(
-                f'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}',
+            response = self.http.post(
+                self.endpoints.url('gemini', f"/v1beta/models/{LLM_MODELS['gemini']}:generateContent?key={api_key}"),
                 headers={'Content-Type': 'application/json'},
                 json={
                     'contents': [{
@@ -120,51 +530,99 @@ class ScriptGenerator:
         
         return None
     
-    def _generate_with_ollama(self, topic: str) -> str:
+    def _generate_with_ollama(self, prompt: str) -> str:
         """Try Ollama local API (if running)"""
         try:
-            prompt_template = self.prompts[self.niche]['script_prompt']
-            prompt = prompt_template.format(topic=topic)
-            
-            response = requests.post(
-                'http://localhost:11434/api/generate',
+            response = self.http.post(
+                self.endpoints.url('ollama', '/api/generate'),
                 json={
-                    'model': 'llama2',
+                    'model': LLM_MODELS['ollama'],
                     'prompt': prompt,
-                    'stream': False
+                    'stream': False,
+                    **({'format': 'json'} if self.structured else {})
                 },
-                timeout=60
+                timeout=60,
+                retries=0
             )
             
             if response.status_code == 200:
                 return response.json()['response']
-        except:
-            pass
+            logger.warning(f"Ollama error: HTTP {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Ollama error: {e}")
         return None
     
-    def _generate_with_huggingface(self, topic: str) -> str:
+    def _generate_with_huggingface(self, prompt: str) -> str:
         """Try Hugging Face Inference API"""
-        api_key = os.getenv('HUGGINGFACE_API_KEY')
+        api_key = self.endpoints.api_key('huggingface')
         if not api_key:
             return None
         
         try:
-            prompt_template = self.prompts[self.niche]['script_prompt']
-            prompt = prompt_template.format(topic=topic)
-            
-            response = requests.post(
-                'https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.1',
+            response = self.http.post(
+                self.endpoints.url('huggingface', f"/models/{LLM_MODELS['huggingface']}"),
                 headers={'Authorization': f'Bearer {api_key}'},
-                json={'inputs': prompt, 'parameters': {'max_new_tokens': 2000}},
+                json={'inputs': prompt, 'parameters': LLM_PARAMS['huggingface']},
                 timeout=60
             )
             
             if response.status_code == 200:
                 return response.json()[0]['generated_text']
-        except:
-            pass
+            logger.error(f"HuggingFace error: HTTP {response.status_code}")
+        except Exception as e:
+            logger.error(f"HuggingFace error: {e}")
         return None
     
+    def _stream_gemini(self, prompt: str) -> Iterator[str]:
+        """Stream text chunks from Gemini's server-sent events endpoint"""
+        response = self.http.post(
+            self.endpoints.url('gemini', f"/v1beta/models/{LLM_MODELS['gemini']}:streamGenerateContent"
+                                         f"?alt=sse&key={self.endpoints.api_key('gemini')}"),
+            headers={'Content-Type': 'application/json'},
+            json={'contents': [{'parts': [{'text': prompt}]}]},
+            timeout=60,
+            stream=True
+        )
+        with response:
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = json.loads(line[5:])
+                for candidate in data.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+    
+    def _stream_ollama(self, prompt: str) -> Iterator[str]:
+        """Stream text chunks from Ollama's newline-delimited JSON responses"""
+        response = self.http.post(
+            self.endpoints.url('ollama', '/api/generate'),
+            json={
+                'model': LLM_MODELS['ollama'],
+                'prompt': prompt,
+                'stream': True,
+                **({'format': 'json'} if self.structured else {})
+            },
+            timeout=60,
+            retries=0,
+            stream=True
+        )
+        with response:
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    raise RuntimeError(data['error'])
+                if data.get('response'):
+                    yield data['response']
+                if data.get('done'):
+                    break
+    
     def _generate_template_based(self, topic: str) -> str:
         """Fallback: Generate script using templates"""
         logger.info("Using template-based generation")
@@ -371,16 +829,21 @@ If you enjoyed this Reddit story, make sure you're subscribed because I post new
         
         return title
     
-    def _generate_description(self, title: str, script: str) -> str:
+    def _generate_description(self, title: str, script: str, summary: Optional[str] = None,
+                              chapters: Optional[List[str]] = None) -> str:
         """Generate YouTube description with timestamps"""
+        summary = summary or f"{script[:200]}..."
+        timestamps = '\n'.join(chapters or [
+            '0:00 - Introduction',
+            '0:30 - Main Content Begins',
+            '7:30 - Conclusion & Call to Action'
+        ])
         description = f"""{title}
 
-{script[:200]}...
+{summary}
 
 📌 TIMESTAMPS:
-0:00 - Introduction
-0:30 - Main Content Begins
-7:30 - Conclusion & Call to Action
+{timestamps}
 
 🔔 SUBSCRIBE for more content like this!
 
@@ -395,6 +858,64 @@ If you enjoyed this Reddit story, make sure you're subscribed because I post new
 
         return description
     
+    def _clean_title(self, title) -> Optional[str]:
+        """LLM title if usable"""
+        if not isinstance(title, str):
+            return None
+        title = title.strip().strip('"\'').strip()
+        return title if 10 <= len(title) <= 100 else None
+    
+    def _clean_summary(self, summary) -> Optional[str]:
+        """LLM description if usable (hashtags and links are added by the template)"""
+        if not isinstance(summary, str) or len(summary.strip()) < 50:
+            return None
+        return summary.strip()[:4000]
+    
+    def _clean_tags(self, tags) -> Optional[List[str]]:
+        """LLM tags if usable, deduplicated and within YouTube's 500 character limit"""
+        if not isinstance(tags, list):
+            return None
+        cleaned, total = [], 0
+        for tag in tags:
+            if not isinstance(tag, str):
+                continue
+            tag = tag.strip().lstrip('#').strip()
+            if not tag or len(tag) > 30 or tag.lower() in (t.lower() for t in cleaned):
+                continue
+            if total + len(tag) > 450 or len(cleaned) >= 30:
+                break
+            cleaned.append(tag)
+            total += len(tag) + 1
+        return cleaned if len(cleaned) >= 5 else None
+    
+    def _chapter_lines(self, chapters, script: str) -> Optional[List[str]]:
+        """Timestamp lines from LLM chapters, timed by word position in the target duration"""
+        if not isinstance(chapters, list):
+            return None
+        paragraphs = [p for p in script.split('\n\n') if p.strip()]
+        offsets, words = [], 0
+        for paragraph in paragraphs:
+            offsets.append(words)
+            words += len(paragraph.split())
+        if not words:
+            return None
+        
+        target = float(self.config['content']['video_length_minutes']) * 60
+        lines, last_time, last_index = [], None, -1
+        for i, chapter in enumerate(chapters):
+            if not isinstance(chapter, dict) or not isinstance(chapter.get('title'), str):
+                continue
+            index = 0 if i == 0 else chapter.get('paragraph')
+            if not isinstance(index, int) or not last_index < index < len(paragraphs):
+                continue
+            seconds = int(offsets[index] / words * target)
+            if last_time is not None and seconds - last_time < 10:
+                continue  # YouTube requires chapters of at least 10 seconds
+            lines.append(f"{seconds // 60}:{seconds % 60:02d} - {chapter['title'].strip()[:80]}")
+            last_time, last_index = seconds, index
+        
+        return lines if len(lines) >= 3 and lines[0].startswith('0:00') else None
+    
     def _generate_tags(self, topic: str, title: str) -> List[str]:
         """Generate 30 relevant tags"""
         base_tags = {
@@ -428,8 +949,8 @@ If you enjoyed this Reddit story, make sure you're subscribed because I post new
         """Save script and metadata to file"""
         os.makedirs(output_dir, exist_ok=True)
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{self.niche}_{timestamp}"
+        # Batch scripts are saved concurrently, so name them by video ID when there is one
+        filename = metadata.get('video_id') or f"{self.niche}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         script_path = os.path.join(output_dir, f"{filename}.txt")
         with open(script_path, 'w', encoding='utf-8') as f:
@@ -439,6 +960,9 @@ If you enjoyed this Reddit story, make sure you're subscribed because I post new
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
         
+        self.index.add(metadata, metadata_path)
+        self.index.save()
+        
         logger.info(f"💾 Script saved: {script_path}")
         return script_path
 
@@ -0,0 +1,238 @@
+"""Script Index - Near-duplicate detection of topics and scripts against earlier videos"""
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+METADATA_SUFFIX = '_metadata.json'
+NUM_PERM = 64
+SCRIPT_BANDS = 16     # 16 bands x 4 rows: candidates from ~50% similarity up
+TOPIC_BANDS = 8       # 8-bit SimHash bands: finds every topic within 7 bits
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def minhash(text: str, shingle: int = 3) -> np.ndarray:
+    """64 MinHash values over word n-grams; equal-value fraction estimates Jaccard similarity"""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    grams = {' '.join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))}
+    values = np.fromiter((zlib.crc32(g.encode('utf-8')) % _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+    if not len(values):
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    return ((_A[:, None] * values[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over character trigrams; robust for short strings like topics"""
+    normalized = f" {' '.join(re.findall(r'[a-z0-9]+', text.lower()))} "
+    weights = [0] * 64
+    for i in range(len(normalized) - 2):
+        value = int.from_bytes(hashlib.blake2b(normalized[i:i + 3].encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class ScriptIndex:
+    """Banded LSH index over data/scripts/*_metadata.json.
+
+    Scripts (title + text) get MinHash signatures split into bands, so a lookup
+    only compares against entries sharing a band. Topics get a SimHash with
+    multi-index bands. Entries of the same video ID never match each other, so
+    a retried video isn't flagged as a copy of its own first attempt.
+    """
+
+    def __init__(self, config: Dict, scripts_dir: str = 'data/scripts'):
+        self.enabled = config.get('enabled', True)
+        self.scripts_dir = scripts_dir
+        self.index_path = config.get('index_path', 'data/script_index.json')
+        self.script_threshold = config.get('script_threshold', 0.8)
+        self.topic_distance = config.get('topic_distance', 6)
+        self.window = config.get('window_days', 90) * 86400
+
+        self.entries = {}     # metadata path -> {'video_id', 'topic', 'created', 'topic_hash', 'signature'}
+        self.script_bands = [{} for _ in range(SCRIPT_BANDS)]
+        self.topic_bands = [{} for _ in range(TOPIC_BANDS)]
+        self.dir_mtime = None
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        if self.enabled:
+            self._load()
+
+    def similar_topic(self, topic: str, video_id: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """(earlier topic, bit distance) of a recent video with a near-identical topic"""
+        if not self.enabled:
+            return None
+        value = simhash(topic)
+        with self._lock:
+            best = None
+            for band, table in zip(self._topic_band_values(value), self.topic_bands):
+                for path in table.get(band, ()):
+                    entry = self.entries[path]
+                    if not self._comparable(entry, video_id):
+                        continue
+                    distance = hamming(value, entry['topic_hash'])
+                    if distance <= self.topic_distance and (best is None or distance < best[1]):
+                        best = (entry['topic'], distance)
+            return best
+
+    def similar_script(self, title: str, script: str, video_id: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """(metadata path, estimated similarity) of the closest recent script above the threshold"""
+        if not self.enabled:
+            return None
+        signature = minhash(f"{title}\n{script}")
+        with self._lock:
+            candidates = set()
+            for band, table in zip(self._script_band_values(signature), self.script_bands):
+                candidates.update(table.get(band, ()))
+
+            best = None
+            for path in candidates:
+                entry = self.entries[path]
+                if not self._comparable(entry, video_id):
+                    continue
+                similarity = float(np.mean(entry['signature'] == signature))
+                if similarity >= self.script_threshold and (best is None or similarity > best[1]):
+                    best = (path, similarity)
+            return best
+
+    def add(self, metadata: Dict, path: str):
+        """Index one saved script"""
+        if not self.enabled:
+            return
+        try:
+            created = datetime.fromisoformat(metadata['timestamp']).timestamp()
+        except (KeyError, ValueError):
+            created = time.time()
+        with self._lock:
+            self._insert(path, {
+                'video_id': metadata.get('video_id'),
+                'topic': metadata.get('topic', ''),
+                'created': created,
+                'topic_hash': simhash(metadata.get('topic', '')),
+                'signature': minhash(f"{metadata.get('title', '')}\n{metadata.get('script', '')}")
+            })
+            self._dirty = True
+
+    def refresh(self) -> int:
+        """Index metadata files written since the last scan (e.g. by other workers)"""
+        if not self.enabled or not os.path.isdir(self.scripts_dir):
+            return 0
+        mtime = os.path.getmtime(self.scripts_dir)
+        if mtime == self.dir_mtime:
+            return 0
+
+        added = 0
+        for entry in os.scandir(self.scripts_dir):
+            if not entry.name.endswith(METADATA_SUFFIX) or entry.path in self.entries:
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self.add(metadata, entry.path)
+            added += 1
+
+        with self._lock:
+            self.dir_mtime = mtime
+            self._dirty = True
+        if added:
+            logger.info(f"🧬 Script index: indexed {added} scripts ({len(self.entries)} total)")
+        return added
+
+    def _comparable(self, entry: Dict, video_id: Optional[str]) -> bool:
+        if video_id and entry['video_id'] == video_id:
+            return False
+        return time.time() - entry['created'] <= self.window
+
+    def _script_band_values(self, signature: np.ndarray) -> List[bytes]:
+        rows = NUM_PERM // SCRIPT_BANDS
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(SCRIPT_BANDS)]
+
+    def _topic_band_values(self, value: int) -> List[int]:
+        return [(value >> (8 * i)) & 0xFF for i in range(TOPIC_BANDS)]
+
+    def _insert(self, path: str, entry: Dict):
+        self.entries[path] = entry
+        for band, table in zip(self._script_band_values(entry['signature']), self.script_bands):
+            table.setdefault(band, set()).add(path)
+        for band, table in zip(self._topic_band_values(entry['topic_hash']), self.topic_bands):
+            table.setdefault(band, set()).add(path)
+
+    def save(self):
+        """Persist the index if it changed"""
+        if not self.enabled or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                'version': 1,
+                'dir_mtime': self.dir_mtime,
+                'entries': {
+                    path: dict(e, topic_hash=f"{e['topic_hash']:016x}", signature=e['signature'].tobytes().hex())
+                    for path, e in self.entries.items()
+                }
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save script index: {e}")
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        self.dir_mtime = data.get('dir_mtime')
+        for path, entry in data.get('entries', {}).items():
+            entry['topic_hash'] = int(entry['topic_hash'], 16)
+            entry['signature'] = np.frombuffer(bytes.fromhex(entry['signature']), dtype=np.uint32)
+            self._insert(path, entry)
+
+
+def main():
+    """Index data/scripts and check a topic against it"""
+    import sys
+    import yaml
+
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+
+    index = ScriptIndex(config.get('script', {}).get('duplicates', {}))
+    index.refresh()
+    index.save()
+    print(f"🧬 {len(index.entries)} scripts indexed")
+
+    topic = sys.argv[1] if len(sys.argv) > 1 else 'cognitive biases'
+    start = time.perf_counter()
+    match = index.similar_topic(topic)
+    print(f"🔎 {topic!r} → {match} ({(time.perf_counter() - start) * 1000:.3f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,248 @@
 """Trending Topics Fetcher - Gets trending topics using Gemini API"""
 import os
-import logging
-import requests
+import re
+import json
+import time
 import random
+import logging
+import threading
+
+from src.http_client import get_client
+from src.llm_cache import get_llm_cache
+from src.llm_endpoints import LLMEndpoints
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class TrendingTopicsFetcher:
-    def __init__(self):
-        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
+NICHE_DESCRIPTIONS = {
+    'psychology_facts': 'psychology and human behavior',
+    'history_mystery': 'historical mysteries and unsolved events',
+    'finance': 'personal finance and money management',
+    'reddit_stories': 'relationship drama and life stories'
+}
+
+
+class TopicPool:
+    """Per-niche pool of trending topics filled by one batched Gemini call.
     
-    def get_trending_topic(self, niche: str) -> str:
-        """Get a trending topic for the niche"""
-        if self.gemini_api_key:
-            topic = self._fetch_from_gemini(niche)
+    Topics are handed out one at a time and never repeated while they are in the
+    recent list. When a niche runs low, a background thread refills it, so the
+    request is usually off the critical path. The pool is persisted so it
+    survives across runs. Each topic is dropped once it is older than the TTL,
+    counted from the refill that fetched it. Topics from the mock endpoint are
+    kept in memory only.
+    """
+    
+    def __init__(self, http, endpoints: LLMEndpoints, config: dict = None):
+        config = config or {}
+        self.http = http
+        self.endpoints = endpoints
+        self.batch_size = config.get('batch_size', 20)
+        self.refresh_below = config.get('refresh_below', 5)
+        self.ttl = config.get('ttl_hours', 24) * 3600
+        self.recent_size = config.get('recent_size', 100)
+        self.path = config.get('path', 'data/cache/topic_pool.json')
+        
+        self.gemini_calls = 0
+        self._pools = {}
+        self._refreshing = {}  # niche -> Event set when its refresh finishes
+        self._lock = threading.Lock()
+        self._load()
+    
+    def take(self, niche: str) -> str:
+        """Next unused topic for the niche, or None if Gemini can't provide one"""
+        with self._lock:
+            pool = self._pool(niche)
+            empty = not pool['topics']
+        
+        if empty:
+            self._refresh(niche, wait=True)
+        
+        with self._lock:
+            pool = self._pool(niche)
+            topic = pool['topics'].pop(0) if pool['topics'] else None
             if topic:
-                return topic
+                pool['fetched'].pop(topic, None)
+                pool['recent'] = (pool['recent'] + [topic])[-self.recent_size:]
+            remaining = len(pool['topics'])
         
-        return self._get_fallback_topic(niche)
+        if topic:
+            logger.info(f"🗂️ Topic pool {niche}: {remaining} topics left")
+            self.save()
+        if topic and remaining < self.refresh_below:
+            self.refresh_async(niche)
+        return topic
+    
+    def refresh_async(self, niche: str):
+        """Refill a niche's pool in a background thread"""
+        threading.Thread(target=self._refresh, args=(niche,), daemon=True).start()
+    
+    def _pool(self, niche: str) -> dict:
+        pool = self._pools.setdefault(niche, {'topics': [], 'recent': [], 'fetched': {}})
+        fetched = pool['fetched']
+        now = time.time()
+        stale = {t for t in pool['topics'] if now - fetched.get(t, 0) > self.ttl}
+        if stale:
+            logger.info(f"🗂️ Topic pool {niche}: {len(stale)} stale topics dropped")
+            pool['topics'] = [t for t in pool['topics'] if t not in stale]
+            for t in stale:
+                fetched.pop(t, None)
+        return pool
     
-    def _fetch_from_gemini(self, niche: str) -> str:
-        """Fetch trending topic using Gemini API"""
+    def _refresh(self, niche: str, wait: bool = False):
+        """Fetch a batch of topics with one Gemini call.
+        
+        Only one refresh of a niche runs at a time; a concurrent call returns at
+        once, or with `wait` blocks until the running one has finished.
+        """
+        with self._lock:
+            running = self._refreshing.get(niche)
+            if not running:
+                done = self._refreshing[niche] = threading.Event()
+        if running:
+            if wait:
+                running.wait()
+            return
+        
+        with self._lock:
+            avoid = self._pool(niche)['recent'][-30:] + self._pool(niche)['topics']
+        
         try:
-            niche_map = {
-                'psychology_facts': 'psychology and human behavior',
-                'history_mystery': 'historical mysteries and unsolved events',
-                'finance': 'personal finance and money management',
-                'reddit_stories': 'relationship drama and life stories'
-            }
-            
-            niche_desc = niche_map.get(niche, niche)
-            
-            prompt = f"""Give me ONE specific trending topic about {niche_desc} that would make a great YouTube video right now.
+            topics = self._request_batch(niche, avoid)
+            with self._lock:
+                pool = self._pool(niche)
+                known = set(pool['recent']) | set(pool['topics'])
+                fresh = [t for t in topics if t not in known]
+                pool['topics'].extend(fresh)
+                pool['fetched'].update(dict.fromkeys(fresh, time.time()))
+            logger.info(f"🗂️ Topic pool {niche}: +{len(fresh)} topics from one Gemini call")
+            self.save()
+        except Exception as e:
+            logger.warning(f"Topic pool refresh for {niche} failed: {e}")
+        finally:
+            with self._lock:
+                del self._refreshing[niche]
+            done.set()
+    
+    def _request_batch(self, niche: str, avoid: list) -> list:
+        niche_desc = NICHE_DESCRIPTIONS.get(niche, niche)
+        avoid_text = f"\n- Must not repeat any of: {'; '.join(avoid)}" if avoid else ''
+        prompt = f"""Give me {self.batch_size} different specific trending topics about {niche_desc} that would make great YouTube videos right now.
 
 Requirements:
 - Must be currently trending or viral
 - Should be specific (not generic)
-- Should be interesting and clickable
-- Just give the topic, no explanation
-
-Example format: "the psychology of social media addiction" or "the mystery of the Dyatlov Pass incident"
-
-Topic:"""
-            
-            response = requests.post(
-                f'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={self.gemini_api_key}',
-                headers={'Content-Type': 'application/json'},
-                json={
-                    'contents': [{
-                        'parts': [{'text': prompt}]
-                    }]
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'candidates' in data and len(data['candidates']) > 0:
-                    topic = data['candidates'][0]['content']['parts'][0]['text'].strip()
-                    topic = topic.replace('"', '').replace("'", "").lower()
-                    logger.info(f"Trending topic from Gemini: {topic}")
-                    return topic
+- Should be interesting and clickable{avoid_text}
+- One topic per line, no numbering, no explanation
+
+Example lines: "the psychology of social media addiction" or "the mystery of the Dyatlov Pass incident"
+
+Topics:"""
+        
+        response = self.http.post(
+            self.endpoints.url('gemini', f"/v1beta/models/gemini-pro:generateContent"
+                                         f"?key={self.endpoints.api_key('gemini')}"),
+            headers={'Content-Type': 'application/json'},
+            json={
+                'contents': [{
+                    'parts': [{'text': prompt}]
+                }]
+            },
+            timeout=30
+        )
+        with self._lock:
+            self.gemini_calls += 1
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        data = response.json()
+        if not data.get('candidates'):
+            return []
+        
+        text = data['candidates'][0]['content']['parts'][0]['text']
+        topics = []
+        for line in text.splitlines():
+            topic = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).strip().strip('"\'').rstrip('.').lower()
+            if 3 <= len(topic) <= 120 and topic not in topics:
+                topics.append(topic)
+        return topics
+    
+    def save(self):
+        """Persist the pools"""
+        if self.endpoints.mock:
+            return
+        with self._lock:
+            data = json.dumps(self._pools)
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save topic pool: {e}")
+    
+    def _load(self):
+        if self.endpoints.mock:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._pools = json.load(f)
+        except (OSError, ValueError):
+            self._pools = {}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_topic_pool(http, endpoints: LLMEndpoints, config: dict = None) -> TopicPool:
+    """Return the process-wide topic pool; the first caller's config wins"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TopicPool(http, endpoints, config)
+        return _pool
+
+
+class TrendingTopicsFetcher:
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.endpoints = LLMEndpoints(config.get('llm'))
+        self.gemini_api_key = self.endpoints.api_key('gemini')
+        self.http = get_client(config.get('http'))
+        self.llm_cache = get_llm_cache(config.get('llm_cache'))
+        self.pool = get_topic_pool(self.http, self.endpoints, config.get('topics'))
+    
+    def get_trending_topic(self, niche: str, scope: str = None) -> str:
+        """Get a trending topic for the niche; the same scope (video ID) gets the same topic"""
+        if self.gemini_api_key:
+            topic = self._fetch_from_gemini(niche, scope)
+            if topic:
+                return topic
+        
+        return self._get_fallback_topic(niche, scope)
+    
+    def _fetch_from_gemini(self, niche: str, scope: str = None) -> str:
+        """Take a trending topic from the niche's pool (batched Gemini calls)"""
+        try:
+            if scope:
+                topic = self.llm_cache.fetch('topic', 'gemini-pool', 'gemini-pro', niche,
+                                             lambda: self.pool.take(niche),
+                                             self.endpoints.cache_params('gemini'), scope)
+            else:
+                topic = self.pool.take(niche)
+            if topic:
+                logger.info(f"Trending topic from Gemini: {topic}")
+                return topic
         
         except Exception as e:
             logger.error(f"Gemini trending topic error: {e}")
         
         return None
     
-    def _get_fallback_topic(self, niche: str) -> str:
+    def _get_fallback_topic(self, niche: str, scope: str = None) -> str:
         """Fallback to predefined topics"""
         fallback_topics = {
             'psychology_facts': [
@@ -123,7 +296,8 @@ Topic:"""
         }
         
         topics = fallback_topics.get(niche, ['general topic'])
-        return random.choice(topics)
+        rng = random.Random(scope) if scope else random
+        return rng.choice(topics)
 
 
 def main():
@@ -0,0 +1,169 @@
+"""TTS Worker - Long-lived pyttsx3 engine running in a dedicated process"""
+import os
+import logging
+import threading
+import multiprocessing
+import queue
+import itertools
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(requests_q, results_q, speed: float, voice_name: str):
+    """Worker process entry point: initialize the engine once, then serve jobs"""
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+
+        rate = engine.getProperty('rate')
+        engine.setProperty('rate', int(rate * speed))
+
+        if 'Guy' in voice_name or 'Male' in voice_name:
+            for voice in engine.getProperty('voices'):
+                if 'male' in voice.name.lower() and 'female' not in voice.name.lower():
+                    engine.setProperty('voice', voice.id)
+                    break
+    except Exception as e:
+        results_q.put(('ready', False, str(e)))
+        return
+
+    results_q.put(('ready', True, None))
+
+    while True:
+        job = requests_q.get()
+        if job is None:
+            break
+
+        job_id, text, output_path = job
+        try:
+            engine.save_to_file(text, output_path)
+            engine.runAndWait()
+            ok = os.path.exists(output_path) and os.path.getsize(output_path) > 0
+            results_q.put((job_id, ok, None if ok else 'empty output'))
+        except Exception as e:
+            results_q.put((job_id, False, str(e)))
+
+
+class Pyttsx3Worker:
+    """Keeps one warm pyttsx3 engine in a child process and feeds it jobs over a queue.
+
+    Jobs are serialized (the engine is not thread-safe), and a job that does not
+    finish within its timeout is treated as a hung engine: the process is killed
+    and a fresh one is started for the next job.
+    """
+
+    def __init__(self, speed: float = 1.0, voice_name: str = '',
+                 startup_timeout: float = 30.0, job_timeout: float = 120.0,
+                 seconds_per_char: float = 0.02):
+        self.speed = speed
+        self.voice_name = voice_name
+        self.startup_timeout = startup_timeout
+        self.job_timeout = job_timeout
+        self.seconds_per_char = seconds_per_char
+        self.restarts = 0  # workers replaced after a crash or a hung job
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+
+    def synthesize(self, text: str, output_path: str) -> bool:
+        """Synthesize text into output_path; returns True on success"""
+        with self._lock:
+            if not self._ensure_started():
+                return False
+
+            job_id = next(self._job_ids)
+            timeout = self.job_timeout + len(text) * self.seconds_per_char
+            self._requests.put((job_id, text, os.path.abspath(output_path)))
+
+            try:
+                while True:
+                    result_id, ok, error = self._results.get(timeout=timeout)
+                    if result_id == job_id:
+                        break
+            except queue.Empty:
+                logger.warning(f"⚠️ pyttsx3 worker hung after {timeout:.0f}s, restarting")
+                self._stop(kill=True)
+                self.restarts += 1
+                return False
+
+            if not ok:
+                logger.error(f"pyttsx3 worker error: {error}")
+            return ok
+
+    def _ensure_started(self) -> bool:
+        """Start the worker process if it is not running"""
+        if self._process is not None and self._process.is_alive():
+            return True
+
+        if self._process is not None:
+            logger.warning("⚠️ pyttsx3 worker died, restarting")
+            self._stop(kill=True)
+            self.restarts += 1
+
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._requests, self._results, self.speed, self.voice_name),
+            daemon=True
+        )
+        self._process.start()
+
+        try:
+            _, ok, error = self._results.get(timeout=self.startup_timeout)
+        except queue.Empty:
+            ok, error = False, f"no ready signal after {self.startup_timeout:.0f}s"
+
+        if not ok:
+            logger.error(f"pyttsx3 worker failed to start: {error}")
+            self._stop(kill=True)
+            return False
+
+        logger.info(f"🔊 pyttsx3 worker ready (pid {self._process.pid})")
+        return True
+
+    def _stop(self, kill: bool = False):
+        """Stop the worker process"""
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+
+        if kill:
+            process.kill()
+        else:
+            try:
+                self._requests.put(None)
+            except Exception:
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        process.join(timeout=5)
+
+    def close(self):
+        """Shut the worker down"""
+        with self._lock:
+            self._stop()
+
+
+def main():
+    """Test pyttsx3 worker"""
+    worker = Pyttsx3Worker()
+    os.makedirs('data/audio', exist_ok=True)
+
+    for i in range(2):
+        path = f'data/audio/worker_test_{i}.wav'
+        ok = worker.synthesize(f"This is worker test number {i + 1}.", path)
+        print(f"{'✅' if ok else '❌'} {path}")
+
+    worker.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Upload Ledger - Persisted resumable upload sessions and finished uploads, keyed by file hash"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UploadLedger:
+    """One entry per video file (SHA-256 of its contents) in a JSON file.
+
+    While an upload runs, the entry holds the resumable session URI and the
+    byte offset the server has committed, rewritten after every chunk, so a
+    crashed run can continue the same session. The title, description, tags and
+    paths are stored too, so the next run resumes it from the ledger alone
+    (YouTubeUploader.resume_pending). Once done it holds the YouTube video ID, so
+    the same file is never uploaded twice. Sessions older than `session_ttl_hours`
+    are not resumed; YouTube expires them after about a week.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        self.path = config.get('ledger_path', 'data/upload_ledger.json')
+        self.session_ttl = config.get('session_ttl_hours', 144) * 3600
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def file_hash(path: str, block_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, file_hash: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            return dict(entry) if entry else None
+
+    def session(self, file_hash: str) -> Optional[Dict]:
+        """The unfinished entry for a file if its session can still be resumed"""
+        entry = self.get(file_hash)
+        if not entry or entry.get('youtube_id') or not entry.get('session_uri'):
+            return None
+        if time.time() - entry.get('session_started', 0) > self.session_ttl:
+            return None
+        return entry
+
+    def pending(self) -> List[Dict]:
+        """Unfinished entries whose session can be resumed and whose file is still on disk"""
+        with self._lock:
+            hashes = list(self._entries)
+        entries = []
+        for file_hash in hashes:
+            entry = self.session(file_hash)
+            if entry and entry.get('video_path') and os.path.exists(entry['video_path']):
+                entries.append(dict(entry, file_hash=file_hash))
+        return entries
+
+    def record(self, file_hash: str, **fields):
+        """Update a file's entry and persist the ledger"""
+        with self._lock:
+            entry = self._entries.setdefault(file_hash, {'created': time.time()})
+            if fields.get('session_uri') and fields['session_uri'] != entry.get('session_uri'):
+                entry['session_started'] = time.time()
+            entry.update(fields, updated=time.time())
+        self.save()
+
+    def save(self):
+        """Persist the ledger atomically"""
+        with self._lock:
+            data = json.dumps(self._entries, indent=2)
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save upload ledger: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
@@ -1,9 +1,11 @@
 """YouTube Uploader - Uploads videos using YouTube Data API v3"""
 import os
+import json
+import time
 import logging
 import pickle
 import base64
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -12,6 +14,9 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
+from src.upload_ledger import UploadLedger
+from src.chunk_sizer import ChunkSizer
+
 # Load environment variables
 load_dotenv()
 
@@ -19,6 +24,32 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class AdaptiveMediaFileUpload(MediaFileUpload):
+    """Resumable file upload whose chunk size is read from a ChunkSizer before every chunk.
+    
+    googleapiclient's HttpRequest.next_chunk asks the media for its size through
+    chunksize() on every chunk, which is not a documented contract. The private
+    _chunksize that MediaIoBaseUpload keeps is mapped onto the sizer too, so a
+    client version that reads the attribute directly still follows it.
+    """
+    
+    def __init__(self, filename: str, sizer: ChunkSizer, mimetype: str = None):
+        self.sizer = sizer
+        super().__init__(filename, mimetype=mimetype, chunksize=sizer.size, resumable=True)
+    
+    @property
+    def _chunksize(self) -> int:
+        return self.sizer.size
+    
+    @_chunksize.setter
+    def _chunksize(self, value: int):
+        pass  # set by MediaIoBaseUpload.__init__; the sizer owns the size
+    
+    def chunksize(self) -> int:
+        return self.sizer.size
 
 
 class YouTubeUploader:
@@ -29,6 +60,11 @@ class YouTubeUploader:
         self.youtube = None
         self.credentials_file = 'client_secret.json'
         self.token_file = 'token.pickle'
+        upload_config = config['youtube'].get('upload', {})
+        self.ledger = UploadLedger(upload_config)
+        self.upload_config = upload_config
+        self.chunk_retries = upload_config.get('chunk_retries', 3)
+        self.chunk_size = None  # learned chunk size, carried over to the next upload
     
     def authenticate(self) -> bool:
         """Authenticate with YouTube API"""
@@ -161,11 +197,24 @@ class YouTubeUploader:
             return None
     
     def upload(self, video_path: str, metadata: Dict, thumbnail_path: Optional[str] = None) -> Optional[str]:
-        """Upload video to YouTube"""
+        """Upload video to YouTube.
+        
+        The session URI and committed offset are written to the upload ledger after
+        every chunk, so a run that dies mid-upload is continued by the next one. A
+        file the ledger records as uploaded is not uploaded again.
+        """
         try:
-            if not self.youtube:
-                if not self.authenticate():
-                    return None
+            size = os.path.getsize(video_path)
+            file_hash = self.ledger.file_hash(video_path)
+            entry = self.ledger.get(file_hash)
+            if entry and entry.get('youtube_id'):
+                logger.info(f"⏭️ Already uploaded as {entry['youtube_id']}, skipping: {video_path}")
+                if thumbnail_path and not entry.get('thumbnail') and self._ensure_authenticated():
+                    self._set_thumbnail(file_hash, entry['youtube_id'], thumbnail_path)
+                return entry['youtube_id']
+            
+            if not self._ensure_authenticated():
+                return None
             
             logger.info(f"📤 Uploading video: {metadata['title']}")
             
@@ -183,12 +232,13 @@ class YouTubeUploader:
                 }
             }
             
-            media = MediaFileUpload(
-                video_path,
-                chunksize=1024*1024,
-                resumable=True,
-                mimetype='video/*'
-            )
+            # Enough to restart the upload from the ledger alone (resume_pending)
+            details = {
+                'video_path': video_path, 'size': size, 'thumbnail_path': thumbnail_path,
+                'title': metadata['title'], 'description': metadata['description'], 'tags': metadata['tags']
+            }
+            sizer = ChunkSizer(self.upload_config, initial=self.chunk_size)
+            media = AdaptiveMediaFileUpload(video_path, sizer, mimetype='video/*')
             
             request = self.youtube.videos().insert(
                 part=','.join(body.keys()),
@@ -197,18 +247,54 @@ class YouTubeUploader:
             )
             
             response = None
+            session = self.ledger.session(file_hash)
+            if session:
+                offset, response = self._query_session(request, session['session_uri'], size)
+                if offset is not None:
+                    request.resumable_uri = session['session_uri']
+                    request.resumable_progress = offset
+                    logger.info(f"♻️ Resuming upload at {offset / size:.0%} "
+                                f"({offset / 2**20:.1f} of {size / 2**20:.1f} MB)")
+            
+            failures = 0
             while response is None:
-                status, response = request.next_chunk()
+                offset = request.resumable_progress
+                start = time.perf_counter()
+                try:
+                    # Retried here rather than by the client so failures can shrink the chunk size;
+                    # after an error the client re-queries the received range before sending
+                    status, response = request.next_chunk()
+                except (HttpError, OSError) as e:
+                    retryable = not isinstance(e, HttpError) or e.resp.status in RETRYABLE_STATUS
+                    failures += 1
+                    if not retryable or failures > self.chunk_retries:
+                        raise
+                    shrunk = sizer.failed()
+                    logger.warning(f"Upload chunk failed ({str(e)[:100]}), retry {failures}/{self.chunk_retries} "
+                                   f"with {sizer.size / 2**20:g} MB chunks{'' if shrunk else ' (minimum size)'}")
+                    time.sleep(min(30, 2 ** failures))
+                    continue
+                failures = 0
+                
+                chunk_size = sizer.size
+                sent = (size if response is not None else request.resumable_progress) - offset
+                speed = sizer.record(sent, time.perf_counter() - start)
+                if response is None and request.resumable_uri:
+                    self.ledger.record(file_hash, **details, session_uri=request.resumable_uri,
+                                       offset=request.resumable_progress)
                 if status:
                     progress = int(status.progress() * 100)
-                    logger.info(f"Upload progress: {progress}%")
+                    logger.info(f"Upload progress: {progress}% ({speed:.2f} MB/s, {chunk_size / 2**20:g} MB chunk)")
             
+            self.chunk_size = sizer.size
+            logger.info(f"📈 Upload: {sizer.summary()}")
             video_id = response['id']
+            self.ledger.record(file_hash, **details, youtube_id=video_id, session_uri=None, offset=size)
             logger.info(f"✅ Video uploaded! ID: {video_id}")
             logger.info(f"🔗 URL: https://www.youtube.com/watch?v={video_id}")
             
-            if thumbnail_path and os.path.exists(thumbnail_path):
-                self._upload_thumbnail(video_id, thumbnail_path)
+            if thumbnail_path:
+                self._set_thumbnail(file_hash, video_id, thumbnail_path)
             
             return video_id
             
@@ -219,6 +305,59 @@ class YouTubeUploader:
             logger.error(f"❌ Upload error: {e}")
             return None
     
+    def resume_pending(self) -> Dict[str, Optional[str]]:
+        """Finish uploads an earlier run left mid-session; returns {video_path: YouTube ID or None}.
+        
+        A re-rendered video never matches its old entry (the file hash differs), so
+        interrupted uploads are continued from the ledger before new videos are made.
+        """
+        results = {}
+        for entry in self.ledger.pending():
+            video_path = entry['video_path']
+            if self.ledger.file_hash(video_path) != entry['file_hash']:
+                logger.warning(f"⚠️ {video_path} changed since its upload started, not resuming it")
+                continue
+            logger.info(f"♻️ Resuming interrupted upload of {video_path} ({entry.get('offset', 0) / 2**20:.1f} MB sent)")
+            metadata = {
+                'title': entry.get('title') or os.path.splitext(os.path.basename(video_path))[0],
+                'description': entry.get('description', ''),
+                'tags': entry.get('tags', [])
+            }
+            results[video_path] = self.upload(video_path, metadata, entry.get('thumbnail_path'))
+        return results
+    
+    def _ensure_authenticated(self) -> bool:
+        return bool(self.youtube) or self.authenticate()
+    
+    def _query_session(self, request, session_uri: str, size: int) -> Tuple[Optional[int], Optional[Dict]]:
+        """Ask the upload server how much of a resumable session it has received.
+        
+        Returns (offset, None) to continue from, (size, video resource) if the
+        earlier upload actually completed, or (None, None) if the session is gone.
+        """
+        try:
+            resp, content = request.http.request(
+                session_uri, method='PUT', body=b'',
+                headers={'Content-Range': f'bytes */{size}', 'Content-Length': '0'}
+            )
+        except Exception as e:
+            logger.warning(f"Could not query upload session, starting a new one: {e}")
+            return None, None
+        
+        if resp.status in (200, 201):
+            logger.info("♻️ Previous upload had already completed")
+            return size, json.loads(content)
+        if resp.status == 308:
+            received = resp.get('range')  # e.g. "bytes=0-52428799"
+            return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+        
+        logger.info(f"Upload session expired (HTTP {resp.status}), starting a new one")
+        return None, None
+    
+    def _set_thumbnail(self, file_hash: str, video_id: str, thumbnail_path: str):
+        if os.path.exists(thumbnail_path) and self._upload_thumbnail(video_id, thumbnail_path):
+            self.ledger.record(file_hash, thumbnail=True)
+    
     def _upload_thumbnail(self, video_id: str, thumbnail_path: str) -> bool:
         """Upload custom thumbnail"""
         try:
@@ -2,7 +2,8 @@
 import os
 import logging
 import subprocess
-from typing import List
+import time
+from typing import Dict, List, Optional
 from moviepy.editor import (
     ImageClip, AudioFileClip, CompositeVideoClip, 
     concatenate_videoclips, VideoFileClip
@@ -10,6 +11,10 @@ from moviepy.editor import (
 from PIL import Image
 import random
 
+from src.media_utils import (
+    MP4_COPYABLE_AUDIO, probe_audio_codec, run_ffmpeg, get_loudness, loudness_gain, iso639_2
+)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -23,11 +28,19 @@ class VideoAssembler:
         self.bitrate = config['video']['bitrate']
         self.transition_duration = config['images']['transition_duration']
         self.ken_burns = config['images']['ken_burns']
+        self.audio_passthrough = config['voice'].get('audio_passthrough', True)
+        self.normalize_loudness = config['voice'].get('normalize_loudness', True)
+        self.loudness_target = config['voice'].get('loudness_target', -14.0)
+        self.loudness_tolerance = config['voice'].get('loudness_tolerance', 0.5)
+        self.last_report = {}
     
-    def assemble(self, image_paths: List[str], audio_path: str, output_path: str) -> bool:
-        """Assemble video from images and audio"""
+    def assemble(self, image_paths: List[str], audio_path: str, output_path: str,
+                 extra_tracks: Optional[List[Dict]] = None) -> bool:
+        """Assemble video from images and audio, muxing any extra voice tracks as additional streams"""
         try:
             logger.info("🎬 Assembling video...")
+            start_time = time.time()
+            self.last_report = {}
             
             audio = AudioFileClip(audio_path)
             audio_duration = audio.duration
@@ -40,31 +53,121 @@ class VideoAssembler:
             logger.info("🎞️ Concatenating clips...")
             video = concatenate_videoclips(clips, method="compose")
             
-            logger.info("🔊 Adding audio...")
-            video = video.set_audio(audio)
+            if self.audio_passthrough or extra_tracks:
+                logger.info("💾 Rendering video (no audio)...")
+                video_only_path = f"{os.path.splitext(output_path)[0]}.video.mp4"
+                video.write_videofile(
+                    video_only_path,
+                    fps=self.fps,
+                    codec=self.codec,
+                    bitrate=self.bitrate,
+                    audio=False,
+                    threads=4,
+                    preset='medium',
+                    logger=None
+                )
+                video.close()
+                audio.close()
+                
+                logger.info("🔊 Muxing audio...")
+                try:
+                    tracks = [{'path': audio_path}] + list(extra_tracks or [])
+                    self._mux_audio(video_only_path, tracks, output_path, audio_duration)
+                finally:
+                    if os.path.exists(video_only_path):
+                        os.remove(video_only_path)
+            else:
+                logger.info("🔊 Adding audio...")
+                video = video.set_audio(audio)
+                
+                logger.info("💾 Rendering video...")
+                video.write_videofile(
+                    output_path,
+                    fps=self.fps,
+                    codec=self.codec,
+                    bitrate=self.bitrate,
+                    audio_codec='aac',
+                    threads=4,
+                    preset='medium',
+                    logger=None
+                )
+                video.close()
+                audio.close()
+                self.last_report['audio'] = 'transcoded'
+                self.last_report['audio_codec'] = 'aac'
             
-            logger.info("💾 Rendering video...")
-            video.write_videofile(
-                output_path,
-                fps=self.fps,
-                codec=self.codec,
-                bitrate=self.bitrate,
-                audio_codec='aac',
-                threads=4,
-                preset='medium',
-                logger=None
-            )
-            
-            video.close()
-            audio.close()
-            
-            logger.info(f"✅ Video assembled: {output_path}")
+            self.last_report['render_seconds'] = round(time.time() - start_time, 2)
+            logger.info(f"✅ Video assembled: {output_path} (audio {self.last_report['audio']})")
             return True
             
         except Exception as e:
             logger.error(f"❌ Video assembly failed: {e}")
             raise
     
+    def _mux_audio(self, video_path: str, audio_tracks: List[Dict], output_path: str,
+                   duration: Optional[float] = None):
+        """Mux voice tracks onto the rendered video, copying audio streams when MP4 allows it.
+
+        Each track is a dict with 'path' and optional 'language' / 'title'; the
+        first track is the default one. The output is cut at `duration` (the video
+        length) so a longer extra track can't extend the file past the last frame;
+        -shortest would instead cut the video at a shorter extra track.
+        """
+        inputs = ['-i', video_path]
+        maps = ['-map', '0:v:0']
+        codec_args = []
+        track_reports = []
+        
+        for i, track in enumerate(audio_tracks):
+            codec = probe_audio_codec(track['path'])
+            gain = self._loudness_gain(track['path'])
+            copy = self.audio_passthrough and codec in MP4_COPYABLE_AUDIO and gain == 0.0
+            
+            inputs += ['-i', track['path']]
+            maps += ['-map', f'{i + 1}:a:0']
+            if copy:
+                codec_args += [f'-c:a:{i}', 'copy']
+            else:
+                codec_args += [f'-c:a:{i}', 'aac', f'-b:a:{i}', '192k']
+                if gain != 0.0:
+                    codec_args += [f'-filter:a:{i}', f'volume={gain:.2f}dB']
+                    logger.info(f"🔉 Applying {gain:+.2f} dB loudness gain to track {i + 1}")
+            
+            language = iso639_2(track.get('language') or self.config['youtube'].get('language', 'und'))
+            codec_args += [f'-metadata:s:a:{i}', f'language={language}']
+            if track.get('title'):
+                codec_args += [f'-metadata:s:a:{i}', f"title={track['title']}"]
+            codec_args += [f'-disposition:a:{i}', 'default' if i == 0 else '0']
+            
+            track_reports.append({
+                'language': language,
+                'audio': 'copied' if copy else 'transcoded',
+                'audio_codec': codec if copy else 'aac',
+                'loudness_gain_db': round(gain, 2)
+            })
+        
+        run_ffmpeg([
+            '-y', *inputs, *maps,
+            '-c:v', 'copy', *codec_args,
+            *(['-t', f'{duration:.3f}'] if duration else []),
+            '-movflags', '+faststart',
+            output_path
+        ])
+        
+        self.last_report.update({k: v for k, v in track_reports[0].items() if k != 'language'})
+        self.last_report['tracks'] = track_reports
+    
+    def _loudness_gain(self, audio_path: str) -> float:
+        """Single-pass gain from the stored loudness measurement (0.0 when within tolerance)"""
+        if not self.normalize_loudness:
+            return 0.0
+        try:
+            gain = loudness_gain(get_loudness(audio_path), self.loudness_target)
+        except Exception as e:
+            logger.warning(f"Loudness unavailable, skipping normalization: {e}")
+            return 0.0
+        return gain if abs(gain) > self.loudness_tolerance else 0.0
+    
     def _create_image_clips(self, image_paths: List[str], total_duration: float) -> List[ImageClip]:
         """Create image clips with effects"""
         clips = []
@@ -2,10 +2,14 @@
 import os
 import logging
 import asyncio
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 import edge_tts
 from gtts import gTTS
-import pyttsx3
+
+from src.tts_worker import Pyttsx3Worker
+from src.provider_router import get_router
+from src.media_utils import MP4_COPYABLE_AUDIO, probe_audio_codec, run_ffmpeg, get_loudness
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,26 +21,43 @@ class VoiceGenerator:
         self.provider = config['voice']['provider']
         self.voice_name = config['voice']['voice_name']
         self.speed = config['voice']['speed']
+        self.pyttsx3_timeout = config['voice'].get('pyttsx3_timeout', 120)
+        self.audio_passthrough = config['voice'].get('audio_passthrough', True)
+        self.normalize_loudness = config['voice'].get('normalize_loudness', True)
+        self.language = config['youtube'].get('language', 'en')
+        self.router = get_router(config.get('routing'))
+        self._pyttsx3_worker = None
     
-    def generate(self, text: str, output_path: str) -> bool:
-        """Generate audio with fallback providers"""
+    def generate(self, text: str, output_path: str, voice_name: Optional[str] = None,
+                 language: Optional[str] = None, group: str = 'tts') -> bool:
+        """Generate audio with fallback providers, ordered and scored in the router's `group`"""
         try:
-            logger.info(f"🎤 Generating voice using {self.provider}")
+            voice_name = voice_name or self.voice_name
+            language = language or self.language
+            logger.info(f"🎤 Generating voice using {self.provider} ({voice_name})")
             
-            if self.provider == 'edge-tts':
-                success = self._generate_edge_tts(text, output_path)
-                if success:
-                    return True
+            providers = {
+                'edge-tts': lambda t, p: self._generate_edge_tts(t, p, voice_name),
+                'gtts': lambda t, p: self._generate_gtts(t, p, language),
+                'pyttsx3': self._generate_pyttsx3
+            }
+            if language.split('-')[0] != self.language.split('-')[0]:
+                # The offline engine only has the default language's voice
+                providers.pop('pyttsx3')
             
-            logger.warning(f"⚠️ {self.provider} failed, trying gTTS")
-            success = self._generate_gtts(text, output_path)
-            if success:
-                return True
+            order = [self.provider] if self.provider in providers else []
+            order += [name for name in providers if name not in order]
+            order = self.router.order(group, order)
             
-            logger.warning("⚠️ gTTS failed, trying pyttsx3")
-            success = self._generate_pyttsx3(text, output_path)
-            if success:
-                return True
+            for i, name in enumerate(order):
+                if i > 0:
+                    logger.warning(f"⚠️ {order[i-1]} failed, trying {name}")
+                if self.router.call(group, name, providers[name], text, output_path):
+                    if self.audio_passthrough:
+                        self._ensure_muxable(output_path)
+                    if self.normalize_loudness:
+                        self._measure_loudness(output_path)
+                    return True
             
             raise Exception("All TTS providers failed")
             
@@ -44,12 +65,12 @@ class VoiceGenerator:
             logger.error(f"❌ Voice generation failed: {e}")
             raise
     
-    def _generate_edge_tts(self, text: str, output_path: str) -> bool:
+    def _generate_edge_tts(self, text: str, output_path: str, voice_name: Optional[str] = None) -> bool:
         """Generate using Edge TTS (best quality, free)"""
         try:
             text_with_pauses = self._add_natural_pauses(text)
             
-            asyncio.run(self._edge_tts_async(text_with_pauses, output_path))
+            asyncio.run(self._edge_tts_async(text_with_pauses, output_path, voice_name or self.voice_name))
             
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
                 logger.info(f"✅ Edge TTS generated: {output_path}")
@@ -60,17 +81,17 @@ class VoiceGenerator:
             logger.error(f"Edge TTS error: {e}")
             return False
     
-    async def _edge_tts_async(self, text: str, output_path: str):
+    async def _edge_tts_async(self, text: str, output_path: str, voice_name: str):
         """Async Edge TTS generation"""
         rate = f"+{int((self.speed - 1) * 100)}%" if self.speed > 1 else f"{int((self.speed - 1) * 100)}%"
         
-        communicate = edge_tts.Communicate(text, self.voice_name, rate=rate)
+        communicate = edge_tts.Communicate(text, voice_name, rate=rate)
         await communicate.save(output_path)
     
-    def _generate_gtts(self, text: str, output_path: str) -> bool:
+    def _generate_gtts(self, text: str, output_path: str, language: Optional[str] = None) -> bool:
         """Generate using Google TTS (fallback)"""
         try:
-            tts = gTTS(text=text, lang='en', slow=False)
+            tts = gTTS(text=text, lang=(language or self.language).split('-')[0], slow=False)
             tts.save(output_path)
             
             if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
@@ -83,24 +104,16 @@ class VoiceGenerator:
             return False
     
     def _generate_pyttsx3(self, text: str, output_path: str) -> bool:
-        """Generate using pyttsx3 (offline fallback)"""
+        """Generate using pyttsx3 (offline, warm engine in a worker process)"""
         try:
-            engine = pyttsx3.init()
-            
-            rate = engine.getProperty('rate')
-            engine.setProperty('rate', int(rate * self.speed))
+            if self._pyttsx3_worker is None:
+                self._pyttsx3_worker = Pyttsx3Worker(
+                    speed=self.speed,
+                    voice_name=self.voice_name,
+                    job_timeout=self.pyttsx3_timeout
+                )
             
-            voices = engine.getProperty('voices')
-            if 'Guy' in self.voice_name or 'Male' in self.voice_name:
-                for voice in voices:
-                    if 'male' in voice.name.lower() and 'female' not in voice.name.lower():
-                        engine.setProperty('voice', voice.id)
-                        break
-            
-            engine.save_to_file(text, output_path)
-            engine.runAndWait()
-            
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            if self._pyttsx3_worker.synthesize(text, output_path):
                 logger.info(f"✅ pyttsx3 generated: {output_path}")
                 return True
             return False
@@ -109,6 +122,66 @@ class VoiceGenerator:
             logger.error(f"pyttsx3 error: {e}")
             return False
     
+    def close(self):
+        """Stop the pyttsx3 worker process if one was started"""
+        if self._pyttsx3_worker is not None:
+            self._pyttsx3_worker.close()
+            self._pyttsx3_worker = None
+    
+    def generate_tracks(self, tracks: List[Dict], output_dir: str, basename: str) -> List[Dict]:
+        """Synthesize several voice tracks concurrently.
+
+        Each track is a dict with 'text', 'language' and optional 'voice_name'.
+        Returns the tracks that succeeded, each with its output 'path' added.
+        Outcomes are scored in their own router group, so a voice or language
+        that fails here never demotes a provider for the main narration.
+        """
+        if not tracks:
+            return []
+        
+        def synthesize(track: Dict) -> Optional[Dict]:
+            path = os.path.join(output_dir, f"{basename}.{track['language']}.mp3")
+            try:
+                self.generate(track['text'], path, track.get('voice_name'), track['language'], group='tts-tracks')
+                return dict(track, path=path)
+            except Exception as e:
+                logger.error(f"❌ Voice track {track['language']} failed: {e}")
+                return None
+        
+        logger.info(f"🎤 Generating {len(tracks)} extra voice tracks")
+        with ThreadPoolExecutor(max_workers=len(tracks)) as executor:
+            results = list(executor.map(synthesize, tracks))
+        
+        return [track for track in results if track]
+    
+    def _ensure_muxable(self, output_path: str):
+        """Make sure the voiceover can be stream-copied into the MP4 by the assembler.
+
+        Edge TTS and gTTS already emit MP3, which MP4 carries as-is. pyttsx3 writes
+        raw PCM, which is encoded once here from the lossless source.
+        """
+        try:
+            codec = probe_audio_codec(output_path)
+            if codec in MP4_COPYABLE_AUDIO:
+                return
+            
+            logger.info(f"🔁 Encoding {codec} voiceover to MP3 for passthrough")
+            temp_path = f"{output_path}.tmp.mp3"
+            run_ffmpeg(['-y', '-i', output_path, '-c:a', 'libmp3lame', '-b:a', '192k', temp_path])
+            os.replace(temp_path, output_path)
+            
+        except Exception as e:
+            logger.warning(f"Could not prepare voiceover for passthrough: {e}")
+    
+    def _measure_loudness(self, output_path: str):
+        """Measure integrated loudness once and store it next to the clip"""
+        try:
+            loudness = get_loudness(output_path)
+            logger.info(f"📏 Loudness: {loudness['integrated_lufs']:.1f} LUFS, "
+                        f"peak {loudness['true_peak_dbfs']:.1f} dBFS")
+        except Exception as e:
+            logger.warning(f"Loudness measurement failed: {e}")
+    
     def _add_natural_pauses(self, text: str) -> str:
         """Add SSML pauses for natural speech"""
         text = text.replace(',', '<break time="300ms"/>,')